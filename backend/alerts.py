@@ -0,0 +1,191 @@
+"""
+Event-driven alerting for high-risk approaches.
+
+Instead of polling, refresh() loads the high-risk approaches of the next few
+days once (after every ingest or re-score) and keeps them in memory. A single
+one-shot scheduler job then wakes at the exact moment the next approach enters
+the alert window, so between ingests alerting does not query the DB at all.
+
+Every alert sent is remembered by (asteroid_id, approach_id) until its
+approach date has passed. An approach is alerted again only if its risk score
+rises by at least ALERT_ESCALATION_DELTA.
+
+With several workers only the scheduler leader (see job_locks.py) sends
+alerts. An ingest on any other worker (e.g. through /api/fetch-asteroids)
+signals the leader to refresh (see fleet.py). The alert memory is per
+process, so after a handover the new leader may repeat the alerts of
+approaches already inside their window once.
+"""
+import os
+import threading
+from datetime import datetime, timedelta
+
+import fleet
+from db import get_connection
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ALERT_RISK_THRESHOLD = float(os.getenv("ALERT_RISK_THRESHOLD", "0.5"))
+ALERT_ESCALATION_DELTA = float(os.getenv("ALERT_ESCALATION_DELTA", "0.1"))
+# An approach is alertable for this long before its approach date
+ALERT_WINDOW = timedelta(hours=24)
+# How far ahead refresh() looks; one feed window plus a day of slack
+ALERT_HORIZON_DAYS = 8
+
+CANDIDATES_SQL = """
+    SELECT a.asteroid_id, aa.approach_id, a.name, aa.approach_date,
+           aa.miss_distance_km, aa.velocity_kmph, aa.risk_score
+    FROM asteroid_approach aa
+    JOIN asteroids a ON a.asteroid_id = aa.asteroid_id
+    WHERE aa.approach_date >= SYSDATE
+    AND aa.approach_date < SYSDATE + :horizon_days
+    AND aa.risk_score > :threshold
+"""
+
+# Approach dates are DB DATEs, so the window is measured on the DB's clock
+DB_NOW_SQL = "SELECT SYSDATE FROM dual"
+
+_lock = threading.Lock()
+_emit = None
+_scheduler = None
+_is_active = None
+_candidates = []    # dicts sorted by enters_at
+_clock_offset = timedelta(0)   # DB clock minus app clock, measured at each refresh
+_alerted = {}       # (asteroid_id, approach_id) -> (risk_score, expires_at)
+_stats = {"refreshes": 0, "evaluations": 0, "alerts_sent": 0, "escalations": 0}
+
+
+def init_alerts(emit, scheduler, is_active=None):
+    """
+    Wire the engine to the app: emit(alerts) broadcasts a list of alert dicts
+    and scheduler runs the refresh and window-entry jobs. Until this is
+    called, on_ingest() only signals the other workers (and does nothing in
+    CLI tools). If is_active() is given and returns False, this worker
+    neither refreshes nor alerts.
+    """
+    global _emit, _scheduler, _is_active
+    _emit = emit
+    _scheduler = scheduler
+    _is_active = is_active
+
+
+def _active():
+    return _is_active is None or _is_active()
+
+
+def _db_now():
+    """The DB's current time, from the app clock and the last measured offset."""
+    return datetime.now() + _clock_offset
+
+
+def _schedule_refresh(_payload=None):
+    if _scheduler is None or not _active():
+        return
+    # One pending refresh covers any number of back-to-back ingests
+    _scheduler.add_job(id="alert_refresh", func=refresh, trigger="date", replace_existing=True)
+
+
+def on_ingest():
+    """
+    Called after approach data commits. The leader refreshes asynchronously on
+    the scheduler; any other worker asks the leader to.
+    """
+    if _scheduler is not None and _active():
+        _schedule_refresh()
+    else:
+        fleet.publish("alerts_refresh")
+
+
+fleet.on("alerts_refresh", _schedule_refresh)
+
+
+def refresh():
+    """Reload upcoming high-risk approaches and send any alerts now due."""
+    global _clock_offset
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(DB_NOW_SQL)
+        clock_offset = cur.fetchone()[0] - datetime.now()
+        cur.execute(CANDIDATES_SQL, {"horizon_days": ALERT_HORIZON_DAYS,
+                                     "threshold": ALERT_RISK_THRESHOLD})
+        candidates = []
+        for asteroid_id, approach_id, name, approach_date, miss_km, velocity, risk_score in cur:
+            candidates.append({
+                "key": (asteroid_id, approach_id),
+                "asteroid": name,
+                "miss_distance": miss_km,
+                "velocity": velocity,
+                "risk_score": risk_score,
+                "enters_at": approach_date - ALERT_WINDOW,
+                "expires_at": approach_date,
+            })
+    finally:
+        cur.close()
+        conn.close()
+
+    candidates.sort(key=lambda c: c["enters_at"])
+    with _lock:
+        _candidates[:] = candidates
+        _clock_offset = clock_offset
+        _stats["refreshes"] += 1
+    evaluate()
+
+
+def evaluate(now=None):
+    """
+    Send alerts for approaches inside the window that are new or escalated,
+    then re-arm the timer. `now` is on the DB's clock.
+    """
+    if not _active():
+        return []
+    now = now or _db_now()
+    due = []
+    with _lock:
+        _stats["evaluations"] += 1
+        for key in [k for k, (_, expires_at) in _alerted.items() if expires_at <= now]:
+            del _alerted[key]
+        _candidates[:] = [c for c in _candidates if c["expires_at"] > now]
+
+        for candidate in _candidates:
+            if candidate["enters_at"] > now:
+                break
+            previous = _alerted.get(candidate["key"])
+            if previous is not None and candidate["risk_score"] < previous[0] + ALERT_ESCALATION_DELTA:
+                continue
+            _alerted[candidate["key"]] = (candidate["risk_score"], candidate["expires_at"])
+            due.append({
+                "asteroid": candidate["asteroid"],
+                "miss_distance": candidate["miss_distance"],
+                "velocity": candidate["velocity"],
+                "risk_score": candidate["risk_score"],
+                "escalated": previous is not None,
+                "message": f"High risk asteroid {candidate['asteroid']} approaching!",
+            })
+            if previous is not None:
+                _stats["escalations"] += 1
+        _stats["alerts_sent"] += len(due)
+        next_entry = next((c["enters_at"] for c in _candidates if c["enters_at"] > now), None)
+
+    if due and _emit is not None:
+        print(f"🚨 Sending {len(due)} alerts!")
+        _emit(due)
+
+    if _scheduler is not None and next_entry is not None:
+        # The scheduler runs on the app's clock
+        _scheduler.add_job(id="alert_window", func=evaluate, trigger="date",
+                           run_date=next_entry - _clock_offset, replace_existing=True)
+    return due
+
+
+def alert_stats():
+    """Engine counters plus the sizes of the candidate and dedup sets."""
+    with _lock:
+        stats = dict(_stats)
+        stats["candidates"] = len(_candidates)
+        stats["alerted"] = len(_alerted)
+        stats["next_window_entry"] = next(
+            (c["enters_at"].isoformat() for c in _candidates if c["enters_at"] > _db_now()), None
+        )
+    return stats
@@ -1,72 +1,204 @@
-from flask import Flask, jsonify
+import os
+import threading
+import time
+from flask import Blueprint, Flask, jsonify
 from flask_cors import CORS
-from auth import auth_bp
-from routes import api_bp
-from nasa import fetch_and_store_asteroids
-from db import test_connection
+from db import run_off_hub, test_connection
 
 from extensions import socketio, scheduler
-from scheduler_jobs import update_asteroid_data, check_alerts
-import socket_events # Register event handlers
+import watchers
+import feed_deltas
+from feed_deltas import init_feed_deltas
+from fleet import init_fleet
+import health
 
-app = Flask(__name__)
-app.config["SCHEDULER_API_ENABLED"] = True
-CORS(app)
+# Every worker runs the scheduler; fleet-wide jobs only do work on the elected
+# leader (see job_locks.py). Set to false to keep a worker out of the election.
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+# How long the background startup waits between DB connection attempts
+STARTUP_DB_RETRY_SECONDS = float(os.getenv("STARTUP_DB_RETRY_SECONDS", "30"))
 
-# Initialize Extensions
-socketio.init_app(app)
+DEFAULT_CONFIG = {
+    "SCHEDULER_API_ENABLED": True,
+    "SCHEDULER_ENABLED": SCHEDULER_ENABLED,
+    # Start the health prober and the DB/scheduler startup thread. Off for
+    # tests and tools that only need the routes.
+    "BACKGROUND_STARTUP": True,
+}
 
-# Check database connectivity before starting scheduler
-print("🔍 Checking database connection...")
-db_available, db_message = test_connection()
+core_bp = Blueprint("core", __name__)
 
-if db_available:
-    print(f"✅ {db_message}")
-    print("🚀 Starting scheduler jobs...")
-    scheduler.init_app(app)
-    scheduler.start()
-    
-    # Schedule Jobs
-    # Update data every 6 hours
-    scheduler.add_job(id='update_data', func=update_asteroid_data, trigger='interval', hours=6)
-    # Check for alerts every 1 minute
-    scheduler.add_job(id='check_alerts', func=check_alerts, trigger='interval', minutes=1)
-    print("✅ Scheduler jobs initialized")
-else:
-    print(f"⚠️  {db_message}")
-    print("⚠️  Scheduler jobs disabled - database unavailable")
-    print("⚠️  Backend will run in limited mode")
+_background_lock = threading.Lock()
+_background_started = False
+_startup = {"created_at": None, "create_ms": None, "scheduler_started_at": None}
 
-app.register_blueprint(auth_bp, url_prefix="/api")
-app.register_blueprint(api_bp, url_prefix="/api")
 
-@app.route("/")
+@core_bp.route("/")
 def home():
     return {"status": "Cosmic Watch Backend Running 🚀"}
 
-@app.route("/health")
-def health():
-    """Health check endpoint showing database status"""
-    db_status, db_msg = test_connection()
-    return jsonify({
-        "status": "running",
-        "database": {
-            "available": db_status,
-            "message": db_msg
-        },
-        "scheduler": {
-            "enabled": db_status
-        }
-    })
-
-@app.route("/api/fetch-asteroids", methods=["GET"])
+@core_bp.route("/health")
+def health_report():
+    """Full health report from memory; always 200, see /health/ready for the probe"""
+    _, report = health.readiness()
+    report["startup"] = startup_stats()
+    return jsonify(report)
+
+@core_bp.route("/health/live")
+def health_live():
+    """Liveness: the process is serving requests"""
+    return jsonify(health.liveness())
+
+@core_bp.route("/health/ready")
+def health_ready():
+    """Readiness: 503 while the DB is unreachable or the pool is saturated"""
+    ready, report = health.readiness()
+    return jsonify(report), 200 if ready else 503
+
+@core_bp.route("/api/fetch-asteroids", methods=["GET"])
 def fetch_asteroids():
+    from nasa import fetch_and_store_asteroids
     try:
         fetch_and_store_asteroids()
         return jsonify({"message": "NASA asteroid data stored in DB 🚀"})
     except Exception as e:
         return jsonify({"error": f"Failed to fetch asteroids: {str(e)}"}), 500
 
+
+def _schedule_jobs():
+    """Start the scheduler and register the jobs; needs the database."""
+    # Imported here: ingestion, archival and re-scoring pull in modules no
+    # request needs before the first job runs
+    import chat_history
+    import job_locks
+    from alerts import init_alerts
+    from job_locks import init_job_locks, leader_job, due_check_seconds
+    from scheduler_jobs import update_asteroid_data, check_alerts, rescore_risk_scores, archive_old_approaches
+
+    print("🚀 Starting scheduler jobs...")
+    scheduler.start()
+
+    # Schedule Jobs
+    # Fleet-wide jobs run on the lease holder only, at most once per interval
+    # Update data every 6 hours
+    scheduler.add_job(id='update_data', func=leader_job('update_data', update_asteroid_data, 6 * 3600),
+                      trigger='interval', seconds=due_check_seconds(6 * 3600))
+    # Archive approach months past the retention window once a day
+    scheduler.add_job(id='archive_approaches', func=leader_job('archive_approaches', archive_old_approaches, 24 * 3600),
+                      trigger='interval', seconds=due_check_seconds(24 * 3600))
+
+    scheduler.add_job(id='load_watchers', func=watchers.load, trigger='date')
+    # Chat history is served from memory; load it before sockets reconnect
+    scheduler.add_job(id='warm_chat_history', func=chat_history.warm, trigger='date')
+
+    # Alerts are event-driven: the leader loads candidates when elected, then
+    # after every ingest/re-score and at each approach's window entry
+    init_alerts(lambda alerts: socketio.emit('alert', {'alerts': alerts}), scheduler,
+                is_active=job_locks.is_leader)
+    # On election, load alerts and re-score stored approaches if the risk model
+    # changed. Scheduled rather than run inline so lease renewal isn't held up.
+    job_locks.on_elected(lambda: scheduler.add_job(
+        id='check_alerts', func=leader_job('check_alerts', check_alerts), trigger='date', replace_existing=True))
+    job_locks.on_elected(lambda: scheduler.add_job(
+        id='rescore_risk', func=leader_job('rescore_risk', rescore_risk_scores), trigger='date', replace_existing=True))
+    # Registered last so the first election sees every callback
+    init_job_locks(scheduler)
+    _startup["scheduler_started_at"] = time.monotonic()
+    print("✅ Scheduler jobs initialized")
+
+
+def _background_startup(scheduler_enabled):
+    """Wait for the database, then start the scheduler. Runs off the request path."""
+    print("🔍 Checking database connection...")
+    while True:
+        db_available, db_message = run_off_hub(test_connection)
+        if db_available:
+            break
+        print(f"⚠️  {db_message}")
+        print(f"⚠️  Backend running in limited mode; retrying in {STARTUP_DB_RETRY_SECONDS:.0f}s")
+        time.sleep(STARTUP_DB_RETRY_SECONDS)
+
+    print(f"✅ {db_message}")
+    try:
+        # Pick up the fleet's feed version so /api/feed/changes can answer
+        run_off_hub(feed_deltas.load)
+    except Exception as e:
+        print(f"⚠️  Could not load the feed version: {e}")
+    if not scheduler_enabled:
+        print("ℹ️  Scheduler disabled on this worker (SCHEDULER_ENABLED=false)")
+        return
+    try:
+        _schedule_jobs()
+    except Exception as e:
+        print(f"❌ Scheduler startup failed: {e}")
+
+
+def _start_background(scheduler_enabled):
+    """Start the health prober and the DB/scheduler startup, once per process."""
+    global _background_started
+    with _background_lock:
+        if _background_started:
+            return
+        _background_started = True
+
+    # Health routes serve the prober's last result
+    health.start()
+    threading.Thread(target=_background_startup, args=(scheduler_enabled,),
+                     name="startup", daemon=True).start()
+
+
+def create_app(config=None):
+    """
+    Build the Flask app. Only cheap, local setup happens here: routes, socket
+    handlers and the emit hooks. Connecting to the database and starting the
+    scheduler happen on a background thread, so the app serves (limited)
+    requests straight away and nothing here needs Oracle.
+    """
+    created = time.monotonic()
+    app = Flask(__name__)
+    app.config.update(DEFAULT_CONFIG)
+    app.config.update(config or {})
+    CORS(app)
+
+    # Imported here so importing this module stays cheap
+    from auth import auth_bp
+    from routes import api_bp
+    import socket_events # Register event handlers
+
+    # Initialize Extensions
+    socketio.init_app(app)
+    # Cache invalidation, chat history and feed deltas reach the other workers
+    init_fleet(socketio.server)
+    if app.config["SCHEDULER_ENABLED"]:
+        # Registers the scheduler API routes, which must exist before the
+        # first request; the scheduler itself starts once the DB is reachable
+        scheduler.init_app(app)
+
+    # Emits from any worker reach every client through the message queue.
+    # Watchlist changes go only to the rooms of the users watching them.
+    watchers.init_watchers(lambda event, payload, room: socketio.emit(event, payload, to=room))
+    # Ingestion publishes a versioned delta instead of a bare "refetch" notice
+    init_feed_deltas(lambda delta: socketio.emit('feed_update', delta))
+
+    app.register_blueprint(auth_bp, url_prefix="/api")
+    app.register_blueprint(api_bp, url_prefix="/api")
+    app.register_blueprint(core_bp)
+
+    if app.config["BACKGROUND_STARTUP"]:
+        _start_background(app.config["SCHEDULER_ENABLED"])
+    _startup["created_at"] = created
+    _startup["create_ms"] = round((time.monotonic() - created) * 1000, 1)
+    return app
+
+
+def startup_stats():
+    """How long create_app() took and how long after it the scheduler came up."""
+    stats = {"create_ms": _startup["create_ms"], "scheduler_ready_after_s": None}
+    if _startup["created_at"] is not None and _startup["scheduler_started_at"] is not None:
+        stats["scheduler_ready_after_s"] = round(_startup["scheduler_started_at"] - _startup["created_at"], 1)
+    return stats
+
+
 if __name__ == "__main__":
-    # Use socketio.run instead of app.run
-    socketio.run(app, debug=True, allow_unsafe_werkzeug=True, host='0.0.0.0', port=5001)
+    # Development server; see serve.py for the multi-worker production mode
+    socketio.run(create_app(), debug=True, allow_unsafe_werkzeug=True, host='0.0.0.0', port=5001)
@@ -0,0 +1,244 @@
+"""
+Retention for the monthly partitions of asteroid_approach.
+
+Months older than ARCHIVE_RETENTION_MONTHS are exported to gzipped JSON
+Lines files in ARCHIVE_DIR (one file per month, approaches_YYYY-MM.jsonl.gz)
+and their partition is then dropped. An existing export is never
+overwritten: if the month is archived again (say rows for it were
+backfilled later), the new file gets a numeric suffix,
+approaches_YYYY-MM.1.jsonl.gz. An archive can be loaded back into
+asteroid_approach_history for historical analysis; that table is not subject
+to retention, so re-attached months stay until they are detached again.
+
+    python archive.py                       # archive and drop expired months
+    python archive.py --dry-run             # only list expired months
+    python archive.py --attach archive/approaches_2023-04.jsonl.gz
+    python archive.py --detach 2023-04
+"""
+import argparse
+import gzip
+import json
+import os
+import re
+from datetime import date, datetime
+
+import feed_deltas
+import response_cache
+from db import get_connection
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive")
+# Requests only read around SYSDATE; keep generous history for the
+# watchlist/risk-analysis views and for backfilled data.
+ARCHIVE_RETENTION_MONTHS = int(os.getenv("ARCHIVE_RETENTION_MONTHS", "24"))
+ARCHIVE_BATCH_SIZE = 5000
+
+ARCHIVE_COLUMNS = (
+    "approach_id", "asteroid_id", "approach_date", "approach_date_full",
+    "epoch_date_close_approach", "velocity_kmps", "velocity_kmph", "velocity_mph",
+    "miss_distance_au", "miss_distance_lunar", "miss_distance_km", "miss_distance_miles",
+    "orbiting_body", "risk_score", "risk_model_version",
+)
+
+# Only interval partitions are archived: the initial range partition
+# anchors the interval scheme and cannot be dropped.
+LIST_PARTITIONS_SQL = """
+    SELECT partition_name, high_value
+    FROM user_tab_partitions
+    WHERE table_name = 'ASTEROID_APPROACH'
+    AND interval = 'YES'
+    ORDER BY partition_position
+"""
+
+INSERT_HISTORY_SQL = f"""
+    INSERT INTO asteroid_approach_history ({", ".join(ARCHIVE_COLUMNS)})
+    VALUES ({", ".join(":" + c for c in ARCHIVE_COLUMNS)})
+"""
+
+
+def _month_start(d, months_back=0):
+    index = d.year * 12 + d.month - 1 - months_back
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _partition_month(high_value):
+    """high_value is the exclusive upper bound, e.g. TO_DATE(' 2024-05-01 00:00:00', ...)."""
+    match = re.search(r"(\d{4})-(\d{2})-(\d{2})", high_value)
+    upper = date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+    return _month_start(upper, 1)
+
+
+def archive_path(month, suffix=0):
+    name = f"approaches_{month:%Y-%m}.{suffix}.jsonl.gz" if suffix else f"approaches_{month:%Y-%m}.jsonl.gz"
+    return os.path.join(ARCHIVE_DIR, name)
+
+
+def month_archives(directory, month):
+    """Every export of `month` (YYYY-MM) in directory, oldest first."""
+    pattern = re.compile(rf"approaches_{re.escape(month)}(?:\.(\d+))?\.jsonl\.gz$")
+    found = []
+    for name in os.listdir(directory or "."):
+        match = pattern.match(name)
+        if match:
+            found.append((int(match.group(1) or 0), os.path.join(directory, name)))
+    return [path for _, path in sorted(found)]
+
+
+def _unused_archive_path(month):
+    suffix = 0
+    while os.path.exists(archive_path(month, suffix)):
+        suffix += 1
+    return archive_path(month, suffix)
+
+
+def expired_months(cur, retention_months=ARCHIVE_RETENTION_MONTHS):
+    """Months whose partition lies entirely before the retention cutoff, oldest first."""
+    cutoff = _month_start(date.today(), retention_months)
+    cur.execute(LIST_PARTITIONS_SQL)
+    return [month for month in (_partition_month(high) for _, high in cur.fetchall())
+            if month < cutoff]
+
+
+def _export_month(cur, month):
+    """Write one month to a new archive file. Returns (rows written, path)."""
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    path = _unused_archive_path(month)
+    tmp_path = f"{path}.tmp"
+
+    cur.arraysize = ARCHIVE_BATCH_SIZE
+    cur.execute(f"""
+        SELECT {", ".join(ARCHIVE_COLUMNS)}
+        FROM asteroid_approach PARTITION FOR (DATE '{month:%Y-%m-%d}')
+        ORDER BY approach_id
+    """)
+
+    rows = 0
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        for row in cur:
+            record = dict(zip(ARCHIVE_COLUMNS, row))
+            if record["approach_date"] is not None:
+                record["approach_date"] = record["approach_date"].isoformat()
+            f.write(json.dumps(record) + "\n")
+            rows += 1
+    os.replace(tmp_path, path)
+    return rows, path
+
+
+def archive_expired(retention_months=ARCHIVE_RETENTION_MONTHS, dry_run=False):
+    """
+    Export and drop every expired month. Returns a list of
+    {"month", "rows", "path"} for the months handled.
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    archived = []
+
+    try:
+        months = expired_months(cur, retention_months)
+        if dry_run:
+            return [{"month": f"{m:%Y-%m}", "rows": None, "path": _unused_archive_path(m)} for m in months]
+
+        for month in months:
+            partition = f"PARTITION FOR (DATE '{month:%Y-%m-%d}')"
+            # Hold off writers (e.g. a backfill) between export and drop; the
+            # DROP's implicit commit releases the lock.
+            cur.execute(f"LOCK TABLE asteroid_approach {partition} IN EXCLUSIVE MODE")
+            rows, path = _export_month(cur, month)
+            cur.execute(f"ALTER TABLE asteroid_approach DROP {partition} UPDATE GLOBAL INDEXES")
+            print(f"📦 Archived {rows} approaches from {month:%Y-%m} to {path}")
+            archived.append({"month": f"{month:%Y-%m}", "rows": rows, "path": path})
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+    if archived:
+        response_cache.invalidate()
+        # Months are archived oldest first, so everything before the end of
+        # the last one is gone
+        feed_deltas.publish(removed_before=f"{_month_start(months[-1], -1):%Y-%m-%d}")
+    return archived
+
+
+def detach(month):
+    """Remove a re-attached month from asteroid_approach_history. `month` is YYYY-MM."""
+    start = datetime.strptime(month, "%Y-%m").date()
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            DELETE FROM asteroid_approach_history
+            WHERE approach_date >= :month_start
+            AND approach_date < ADD_MONTHS(:month_start, 1)
+        """, {"month_start": start})
+        removed = cur.rowcount
+        conn.commit()
+        return removed
+    finally:
+        cur.close()
+        conn.close()
+
+
+def attach(path):
+    """
+    Load an archived month into asteroid_approach_history, replacing any copy
+    of that month already there. Every export of the month next to `path`
+    is loaded, including suffixed re-exports. Returns the number of rows loaded.
+    """
+    month = re.search(r"(\d{4}-\d{2})", os.path.basename(path)).group(1)
+    paths = month_archives(os.path.dirname(path), month) or [path]
+    detach(month)
+
+    conn = get_connection()
+    cur = conn.cursor()
+    loaded = 0
+    try:
+        batch = []
+        for archive in paths:
+            with gzip.open(archive, "rt", encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    if record["approach_date"] is not None:
+                        record["approach_date"] = datetime.fromisoformat(record["approach_date"])
+                    batch.append(record)
+                    if len(batch) >= ARCHIVE_BATCH_SIZE:
+                        cur.executemany(INSERT_HISTORY_SQL, batch)
+                        loaded += len(batch)
+                        batch = []
+        if batch:
+            cur.executemany(INSERT_HISTORY_SQL, batch)
+            loaded += len(batch)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+    print(f"📂 Attached {loaded} approaches from {', '.join(paths)} to asteroid_approach_history")
+    return loaded
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive old asteroid_approach partitions.")
+    parser.add_argument("--retention-months", type=int, default=ARCHIVE_RETENTION_MONTHS)
+    parser.add_argument("--dry-run", action="store_true", help="list expired months without archiving")
+    parser.add_argument("--attach", metavar="PATH", help="load an archive into asteroid_approach_history")
+    parser.add_argument("--detach", metavar="YYYY-MM", help="remove a month from asteroid_approach_history")
+    args = parser.parse_args()
+
+    if args.attach:
+        attach(args.attach)
+    elif args.detach:
+        print(f"🧹 Removed {detach(args.detach)} rows for {args.detach} from asteroid_approach_history")
+    else:
+        results = archive_expired(args.retention_months, args.dry_run)
+        if args.dry_run:
+            for result in results:
+                print(f"🔍 {result['month']} would be archived to {result['path']}")
+        print(f"✅ {len(results)} expired months {'found' if args.dry_run else 'archived'}.")
@@ -1,9 +1,13 @@
 from flask import Blueprint, request, jsonify
-import bcrypt
 import jwt
 import datetime
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from db import get_connection
+from middleware import token_required
+import user_cache
+from passwords import HashingBusy, check_password, hash_password, needs_rehash, record_rehash
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -11,6 +15,12 @@ load_dotenv()
 auth_bp = Blueprint("auth", __name__)
 JWT_SECRET = os.getenv("JWT_SECRET")
 
+
+def _busy():
+    response = jsonify({"error": "Authentication is busy, please retry"})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
 # ---------------- REGISTER ----------------
 @auth_bp.route("/register", methods=["POST"])
 def register():
@@ -19,10 +29,10 @@ def register():
     if not data.get("email") or not data.get("password"):
         return jsonify({"error": "Missing email or password"}), 400
 
-    hashed_password = bcrypt.hashpw(
-        data["password"].encode("utf-8"),
-        bcrypt.gensalt()
-    ).decode("utf-8")
+    try:
+        hashed_password = hash_password(data["password"])
+    except HashingBusy:
+        return _busy()
 
     conn = get_connection()
     cur = conn.cursor()
@@ -52,6 +62,41 @@ def register():
 
 
 # ---------------- LOGIN ----------------
+# Rehashes run after the login response, one user at a time
+_rehash_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rehash")
+_rehash_lock = threading.Lock()
+_rehash_pending = set()
+
+
+def _rehash(user_id, password):
+    """Re-hash a password stored at an old BCRYPT_ROUNDS. Best effort: retried on the next login."""
+    try:
+        new_hash = hash_password(password)
+        conn = get_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute("""
+                UPDATE users SET password_hash = :password_hash WHERE user_id = :user_id
+            """, {"password_hash": new_hash, "user_id": user_id})
+            conn.commit()
+            record_rehash()
+        finally:
+            cur.close()
+            conn.close()
+    except Exception as e:
+        print(f"⚠️  Password rehash skipped for user {user_id}: {e}")
+    finally:
+        with _rehash_lock:
+            _rehash_pending.discard(user_id)
+
+
+def _schedule_rehash(user_id, password):
+    with _rehash_lock:
+        if user_id in _rehash_pending:
+            return
+        _rehash_pending.add(user_id)
+    _rehash_executor.submit(_rehash, user_id, password)
+
 @auth_bp.route("/login", methods=["POST"])
 def login():
     data = request.json
@@ -74,15 +119,18 @@ def login():
 
     user_id, db_password, role, is_verified = user
 
-    if not bcrypt.checkpw(
-        data["password"].encode("utf-8"),
-        db_password.encode("utf-8")
-    ):
-        return jsonify({"error": "Invalid email or password"}), 401
+    try:
+        if not check_password(data["password"], db_password):
+            return jsonify({"error": "Invalid email or password"}), 401
+    except HashingBusy:
+        return _busy()
 
     if is_verified == "NO":
         return jsonify({"error": "Email not verified"}), 403
 
+    if needs_rehash(db_password):
+        _schedule_rehash(user_id, data["password"])
+
     token = jwt.encode(
         {
             "user_id": user_id,
@@ -97,3 +145,33 @@ def login():
         "message": "Login successful",
         "token": token
     })
+
+
+# ---------------- PROFILE ----------------
+@auth_bp.route("/profile", methods=["PUT"])
+@token_required
+def update_profile(user_id):
+    data = request.json or {}
+    full_name = (data.get("full_name") or "").strip()
+
+    if not full_name:
+        return jsonify({"error": "Missing full_name"}), 400
+
+    conn = get_connection()
+    cur = conn.cursor()
+
+    try:
+        cur.execute("""
+            UPDATE users SET full_name = :full_name WHERE user_id = :user_id
+        """, {"full_name": full_name, "user_id": user_id})
+        conn.commit()
+        # Chat resolves names from the cache; drop the stale one
+        user_cache.invalidate(user_id)
+        return jsonify({"message": "Profile updated"})
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
+    finally:
+        cur.close()
+        conn.close()
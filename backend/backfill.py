@@ -0,0 +1,149 @@
+"""
+Historical backfill of the NeoWs feed.
+
+Splits a date range into the feed's 7-day windows, downloads them to the
+on-disk feed cache with a bounded thread pool and streams each one through the
+bulk writer as soon as it arrives. Finished windows are recorded in a checkpoint file, so re-running the
+same command after an interruption picks up where it stopped.
+
+    python backfill.py --from 2020-01-01 --to 2026-10-01 --workers 4
+
+Point NASA_URL (or --feed-url) at a local server to replay recorded feed pages,
+e.g. the one in feed_stub_server.py.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import date, datetime, timedelta
+
+import feed_cache
+import nasa
+
+DEFAULT_CHECKPOINT = os.getenv("BACKFILL_CHECKPOINT", ".backfill_checkpoint.json")
+
+
+def split_windows(start, end, days=nasa.FEED_WINDOW_DAYS):
+    """Split the inclusive range [start, end] into consecutive windows of at most `days` days."""
+    windows = []
+    current = start
+    while current <= end:
+        window_end = min(current + timedelta(days=days - 1), end)
+        windows.append((current.isoformat(), window_end.isoformat()))
+        current = window_end + timedelta(days=1)
+    return windows
+
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        return set(json.load(f).get("completed", []))
+
+
+def save_checkpoint(path, completed):
+    # Write to a temp file and swap it in so a crash never leaves a torn checkpoint
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"completed": sorted(completed)}, f)
+    os.replace(tmp_path, path)
+
+
+def window_key(window):
+    return f"{window[0]}:{window[1]}"
+
+
+def run_backfill(start, end, workers=4, checkpoint_path=DEFAULT_CHECKPOINT):
+    """
+    Backfill [start, end] (datetime.date). Returns a summary dict.
+    Fetches run on up to `workers` threads; writes happen on the calling thread
+    in completion order, overlapping with the fetches still in flight.
+    """
+    completed = load_checkpoint(checkpoint_path)
+    pending = [w for w in split_windows(start, end) if window_key(w) not in completed]
+
+    print(f"🛰  Backfill {start} → {end}: {len(pending)} windows to fetch "
+          f"({len(completed)} already done), {workers} workers")
+
+    started = time.perf_counter()
+    stored_rows = 0
+    failed = []
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        queue = iter(pending)
+        in_flight = {}
+
+        def submit_next():
+            window = next(queue, None)
+            if window is not None:
+                in_flight[executor.submit(nasa.fetch_feed_file, *window)] = window
+
+        # Keep at most two windows per worker in flight at once
+        for _ in range(workers * 2):
+            submit_next()
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                window = in_flight.pop(future)
+                submit_next()
+                try:
+                    body, digest = future.result()
+                    with body:
+                        if feed_cache.already_ingested(window, digest):
+                            result = nasa.skipped_result()
+                        else:
+                            result = nasa.store_feed_stream(body)
+                            feed_cache.mark_ingested(window, digest)
+                except Exception as e:
+                    print(f"❌ Window {window[0]} → {window[1]} failed: {e}")
+                    failed.append(window)
+                    continue
+
+                stored_rows += result["asteroids"] + result["approaches"]
+                completed.add(window_key(window))
+                save_checkpoint(checkpoint_path, completed)
+                print(f"✅ Window {window[0]} → {window[1]} stored")
+
+    elapsed = time.perf_counter() - started
+    print(f"🏁 Backfill finished in {elapsed:.1f}s: {stored_rows} rows, "
+          f"{len(pending) - len(failed)} windows stored, {len(failed)} failed")
+
+    return {
+        "windows": len(pending),
+        "failed": failed,
+        "rows": stored_rows,
+        "elapsed_sec": elapsed
+    }
+
+
+def _parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backfill historical NeoWs feed data.")
+    parser.add_argument("--from", dest="start", type=_parse_date, required=True,
+                        help="first day to ingest (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="end", type=_parse_date, default=date.today(),
+                        help="last day to ingest (YYYY-MM-DD), defaults to today")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="concurrent feed downloads")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT,
+                        help="file recording finished windows")
+    parser.add_argument("--feed-url", help="override NASA_URL, e.g. a local stub server")
+    args = parser.parse_args(argv)
+
+    if args.end < args.start:
+        parser.error("--to must not be before --from")
+    if args.feed_url:
+        nasa.NASA_URL = args.feed_url
+
+    summary = run_backfill(args.start, args.end, args.workers, args.checkpoint)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Login throughput vs socket responsiveness under eventlet.
+
+Each mode runs in a fresh, monkey-patched subprocess: --logins green threads
+verify passwords back to back while --sockets green threads simulate socket
+traffic by ticking every 5 ms and recording how late each tick fires.
+"inline" calls bcrypt on the green thread (the old behaviour), "offload" goes
+through passwords.check_password.
+
+    python bench_auth.py --seconds 5 --logins 8 --sockets 200 --rounds 12
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+TICK_SECONDS = 0.005
+
+
+def run_mode(mode, seconds, logins, sockets, rounds):
+    import eventlet
+    eventlet.monkey_patch()
+
+    import os
+    os.environ["BCRYPT_ROUNDS"] = str(rounds)
+    import time
+    import bcrypt
+    import passwords
+
+    hashed = bcrypt.hashpw(b"correct horse", bcrypt.gensalt(rounds)).decode("utf-8")
+    deadline = time.monotonic() + seconds
+    done = [0]
+    lags = []
+
+    def login_loop():
+        while time.monotonic() < deadline:
+            if mode == "inline":
+                bcrypt.checkpw(b"correct horse", hashed.encode("utf-8"))
+            else:
+                passwords.check_password("correct horse", hashed)
+            done[0] += 1
+            eventlet.sleep(0)
+
+    def socket_loop():
+        while time.monotonic() < deadline:
+            started = time.monotonic()
+            eventlet.sleep(TICK_SECONDS)
+            lags.append((time.monotonic() - started - TICK_SECONDS) * 1000)
+
+    pool = eventlet.GreenPool(logins + sockets)
+    for _ in range(sockets):
+        pool.spawn(socket_loop)
+    for _ in range(logins):
+        pool.spawn(login_loop)
+    pool.waitall()
+
+    lags.sort()
+    print(json.dumps({
+        "mode": mode,
+        "logins_per_sec": done[0] / seconds,
+        "ticks": len(lags),
+        "lag_p50_ms": lags[len(lags) // 2],
+        "lag_p99_ms": lags[int(len(lags) * 0.99)],
+        "lag_max_ms": lags[-1],
+    }))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark bcrypt logins against concurrent socket traffic.")
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--logins", type=int, default=8)
+    parser.add_argument("--sockets", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--mode", choices=["inline", "offload"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.seconds, args.logins, args.sockets, args.rounds)
+        sys.exit(0)
+
+    for mode in ("inline", "offload"):
+        out = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, "--seconds", str(args.seconds),
+             "--logins", str(args.logins), "--sockets", str(args.sockets), "--rounds", str(args.rounds)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        print(f"{mode:>8}: {result['logins_per_sec']:6.1f} logins/sec, socket tick lag "
+              f"p50 {result['lag_p50_ms']:7.1f} ms, p99 {result['lag_p99_ms']:7.1f} ms, "
+              f"max {result['lag_max_ms']:7.1f} ms ({result['ticks']} ticks)")
@@ -0,0 +1,53 @@
+"""
+Microbenchmark: scalar calculate_risk loop vs calculate_risk_batch.
+
+Also checks that both produce bit-identical scores on the generated inputs,
+including the edge values around the distance, diameter and velocity caps.
+
+    python bench_risk.py
+"""
+import time
+import numpy as np
+from risk import calculate_risk, calculate_risk_batch, current_model
+
+SIZES = (1_000, 100_000, 1_000_000)
+
+
+def make_inputs(n, seed=0):
+    near, far = current_model()["dist_near_km"], current_model()["dist_far_km"]
+    rng = np.random.default_rng(seed)
+    miss_km = rng.uniform(0, 2 * far, n)
+    vel_kmph = rng.uniform(0, 200_000, n)
+    diam_m = rng.uniform(0, 2_000, n)
+    hazardous = np.where(rng.random(n) < 0.2, "YES", "NO")
+
+    # Pin a few rows to the exact band edges and to non-finite values
+    edges = [near, far, near - 1, far + 1, np.nan, np.inf]
+    k = min(n, len(edges))
+    miss_km[:k] = edges[:k]
+    return miss_km, vel_kmph, diam_m, hazardous
+
+
+def run_scalar(miss_km, vel_kmph, diam_m, hazardous):
+    return np.array([
+        calculate_risk(m, v, d, h)
+        for m, v, d, h in zip(miss_km.tolist(), vel_kmph.tolist(), diam_m.tolist(), hazardous.tolist())
+    ])
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    print(f"{'rows':>10} {'scalar (s)':>12} {'batch (s)':>12} {'speedup':>9}  parity")
+    for n in SIZES:
+        inputs = make_inputs(n)
+        scalar, t_scalar = timed(run_scalar, *inputs)
+        batch, t_batch = timed(calculate_risk_batch, *inputs)
+
+        mismatches = int(np.count_nonzero(scalar.view(np.int64) != batch.view(np.int64)))
+        parity = "✅" if mismatches == 0 else f"❌ {mismatches} mismatches"
+        print(f"{n:>10} {t_scalar:>12.4f} {t_batch:>12.4f} {t_scalar / t_batch:>8.1f}x  {parity}")
@@ -0,0 +1,126 @@
+"""
+Time to first request of a production worker, and what importing app costs.
+
+Starts `serve.py --worker-port` (the real eventlet worker) as a subprocess and
+polls /health/live until it answers. By default the worker's DB_DSN points at
+a local port that accepts connections and never replies, the worst case for
+startup: the database must not be on the path to the first response. Exits
+non-zero if time to first request exceeds --target-ms.
+
+    python bench_startup.py --target-ms 3000
+    python bench_startup.py --db env   # use the DB settings from .env instead
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def silent_listener():
+    """A TCP port that accepts connections and never answers. Returns its port."""
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(16)
+    held = []
+
+    def accept_forever():
+        while True:
+            conn, _ = server.accept()
+            held.append(conn)
+
+    threading.Thread(target=accept_forever, daemon=True).start()
+    return server.getsockname()[1]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_to_first_request(env, timeout):
+    port = free_port()
+    started = time.monotonic()
+    worker = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, "serve.py"), "--worker-port", str(port), "--host", "127.0.0.1"],
+        cwd=HERE, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.monotonic() - started < timeout:
+            if worker.poll() is not None:
+                raise RuntimeError(f"worker exited with {worker.returncode} before serving")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health/live", timeout=1) as response:
+                    if response.status == 200:
+                        return (time.monotonic() - started) * 1000
+            except OSError:
+                time.sleep(0.02)
+        return None
+    finally:
+        worker.terminate()
+        try:
+            worker.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            worker.kill()
+
+
+def import_costs(env, top, timeout):
+    """(total_ms, [(cumulative_ms, module)]) for `import app`, from -X importtime."""
+    try:
+        out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"],
+                             cwd=HERE, env=env, capture_output=True, text=True, timeout=timeout).stderr
+    except subprocess.TimeoutExpired:
+        return None, []
+    modules = []
+    for line in out.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Direct imports of app.py only: one indent level below " app"
+        if name.startswith("   ") and not name.startswith("     "):
+            modules.append((int(cumulative) / 1000, name.strip()))
+    total = next((int(line.split("|")[1]) / 1000 for line in out.splitlines()
+                  if line.rstrip().endswith("| app")), None)
+    return total, sorted(modules, reverse=True)[:top]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark worker startup time.")
+    parser.add_argument("--target-ms", type=float, default=3000)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--top", type=int, default=8, help="slowest imports to list")
+    parser.add_argument("--db", choices=["silent", "env"], default="silent")
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONUNBUFFERED="1")
+    env.pop("SOCKETIO_MESSAGE_QUEUE", None)
+    if args.db == "silent":
+        env.update(DB_DSN=f"127.0.0.1:{silent_listener()}/bench", DB_USER="bench", DB_PASSWORD="bench")
+
+    total, modules = import_costs(env, args.top, args.timeout)
+    print(f"import app: {total:.1f} ms" if total is not None else f"import app: over {args.timeout:.0f}s")
+    for cumulative, name in modules:
+        print(f"  {cumulative:8.1f} ms  {name}")
+
+    timings = []
+    for _ in range(args.runs):
+        elapsed = time_to_first_request(env, args.timeout)
+        if elapsed is None:
+            print(f"❌ No response within {args.timeout:.0f}s")
+            sys.exit(1)
+        timings.append(elapsed)
+
+    worst = max(timings)
+    print(f"time to first request: best {min(timings):.0f} ms, worst {worst:.0f} ms "
+          f"over {len(timings)} runs (target {args.target_ms:.0f} ms)")
+    if worst > args.target_ms:
+        print("❌ Startup is over target")
+        sys.exit(1)
+    print("✅ Startup within target")
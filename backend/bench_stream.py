@@ -0,0 +1,122 @@
+"""
+Memory benchmark: json.load of a whole feed vs the streaming parser.
+
+Writes a synthetic multi-day feed of roughly --size-mb megabytes, then ingests
+it in a fresh subprocess per mode (with a no-op DB writer) and reports each
+child's peak RSS. With streaming, peak RSS should track --batch-size rather
+than the payload size.
+
+    python bench_stream.py --size-mb 50 --batch-size 500
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+
+def synthetic_neo(i):
+    diameter = {
+        unit: {"estimated_diameter_min": 10.0 + i % 500, "estimated_diameter_max": 25.0 + i % 900}
+        for unit in ("kilometers", "meters", "miles", "feet")
+    }
+    approaches = [{
+        "close_approach_date": "2026-10-18",
+        "close_approach_date_full": "2026-Oct-18 10:00",
+        "epoch_date_close_approach": 1792317600000 + i * 1000 + k,
+        "relative_velocity": {
+            "kilometers_per_second": str(5 + (i + k) % 30),
+            "kilometers_per_hour": str(18000 + ((i + k) * 37) % 90000),
+            "miles_per_hour": str(11000 + ((i + k) * 23) % 56000),
+        },
+        "miss_distance": {
+            "astronomical": "0.1",
+            "lunar": "38.9",
+            "kilometers": str(200000 + ((i + k) * 7919) % 12000000),
+            "miles": "9290000",
+        },
+        "orbiting_body": "Earth",
+    } for k in range(3)]
+
+    return {
+        "links": {"self": f"https://api.nasa.gov/neo/rest/v1/neo/{3000000 + i}"},
+        "id": str(3000000 + i),
+        "neo_reference_id": str(3000000 + i),
+        "name": f"(2026 SYN{i})",
+        "nasa_jpl_url": f"https://ssd.jpl.nasa.gov/tools/sbdb_lookup.html#/?sstr={3000000 + i}",
+        "absolute_magnitude_h": 20.0 + (i % 100) / 10.0,
+        "estimated_diameter": diameter,
+        "is_potentially_hazardous_asteroid": i % 7 == 0,
+        "close_approach_data": approaches,
+        "is_sentry_object": False,
+    }
+
+
+def write_feed(path, size_mb, days=7):
+    """Write the feed incrementally so generating it doesn't skew the measurement."""
+    target = size_mb * 1024 * 1024
+    per_day = max(1, target // (days * len(json.dumps(synthetic_neo(0)))))
+    start = date(2026, 10, 12)
+
+    i = 0
+    with open(path, "w") as f:
+        f.write('{"links": {}, "element_count": %d, "near_earth_objects": {' % (per_day * days))
+        for d in range(days):
+            f.write("%s%s: [" % ("," if d else "", json.dumps((start + timedelta(days=d)).isoformat())))
+            for n in range(per_day):
+                f.write(("," if n else "") + json.dumps(synthetic_neo(i)))
+                i += 1
+            f.write("]")
+        f.write("}}")
+    return i
+
+
+def run_mode(mode, path, batch_size):
+    import nasa
+
+    def discard(asteroids, approaches):
+        return []
+
+    started = time.perf_counter()
+    with open(path, "rb") as f:
+        if mode == "load":
+            counts = nasa.ingest_neos(nasa.feed_neos(json.load(f)), discard, None)
+        else:
+            counts = nasa.ingest_neos(nasa.iter_feed_neos(f), discard, batch_size)
+    elapsed = time.perf_counter() - started
+
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"mode": mode, "asteroids": counts[0], "approaches": counts[1],
+                      "elapsed_sec": elapsed, "peak_rss_mb": peak_mb}))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare peak RSS of whole-payload vs streaming ingestion.")
+    parser.add_argument("--size-mb", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--mode", choices=["load", "stream"], help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.path, args.batch_size)
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "feed.json")
+        neos = write_feed(path, args.size_mb)
+        print(f"📦 Synthetic feed: {os.path.getsize(path) / 1024 / 1024:.1f} MB, {neos} NEOs")
+
+        for mode in ("load", "stream"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--mode", mode, "--path", path,
+                 "--batch-size", str(args.batch_size)],
+                check=True, capture_output=True, text=True
+            ).stdout
+            result = json.loads(out.strip().splitlines()[-1])
+            print(f"{mode:>7}: peak RSS {result['peak_rss_mb']:7.1f} MB, "
+                  f"{result['elapsed_sec']:6.2f}s, {result['approaches']} approaches")
@@ -0,0 +1,123 @@
+"""
+Recent chat history kept in memory.
+
+A ring buffer of the last CHAT_HISTORY_SIZE messages is warmed from the
+messages table once and then appended to by handle_message, so sending
+chat_history to a new socket needs no DB access. Older history is paged from
+the DB by message_id: a client passes the smallest id it holds and gets the
+page before it.
+
+Messages are persisted write-behind (see chat_writer.py), so an entry gets its
+"id" only after its batch is flushed; until then it is None. Once stored, the
+entries are shared with the other workers (see fleet.py), so every worker's
+buffer holds messages sent through any of them.
+"""
+import os
+import threading
+from collections import deque
+from datetime import datetime
+
+import fleet
+from db import get_connection
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CHAT_HISTORY_SIZE = int(os.getenv("CHAT_HISTORY_SIZE", "50"))
+CHAT_PAGE_MAX = 100
+
+RECENT_MESSAGES_SQL = """
+    SELECT message_id, sender_name, message_text, created_at
+    FROM messages
+    ORDER BY message_id DESC
+    FETCH FIRST :row_limit ROWS ONLY
+"""
+
+OLDER_MESSAGES_SQL = """
+    SELECT message_id, sender_name, message_text, created_at
+    FROM messages
+    WHERE message_id < :before_id
+    ORDER BY message_id DESC
+    FETCH FIRST :row_limit ROWS ONLY
+"""
+
+_lock = threading.Lock()
+_buffer = deque(maxlen=CHAT_HISTORY_SIZE)
+_warmed = False
+
+
+def _entry(row):
+    message_id, sender_name, message_text, created_at = row
+    return {
+        "id": message_id,
+        "user": sender_name,
+        "message": message_text,
+        "timestamp": created_at.isoformat() if created_at else None,
+    }
+
+
+def _query(sql, binds):
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(sql, binds)
+        # Newest first from the DB; callers want chronological order
+        return [_entry(row) for row in reversed(cur.fetchall())]
+    finally:
+        cur.close()
+        conn.close()
+
+
+def warm():
+    """Load the latest messages into the buffer. Safe to call more than once."""
+    global _warmed
+    with _lock:
+        if _warmed:
+            return
+        entries = _query(RECENT_MESSAGES_SQL, {"row_limit": CHAT_HISTORY_SIZE})
+        # Keep messages sent before the first warm-up, unless already stored
+        stored = {entry["id"] for entry in entries}
+        pending = [entry for entry in _buffer if entry["id"] not in stored]
+        _buffer.clear()
+        _buffer.extend(entries + pending)
+        _warmed = True
+
+
+def new_entry(user_name, message_text):
+    """Entry for a message being sent now. chat_writer fills in its id once stored."""
+    return {"id": None, "user": user_name, "message": message_text,
+            "timestamp": datetime.now().isoformat()}
+
+
+def append(entry):
+    with _lock:
+        _buffer.append(entry)
+
+
+def share(entries):
+    """Send entries this worker has just stored to the other workers' buffers."""
+    if entries:
+        fleet.publish("chat_stored", entries)
+
+
+def _add_shared(entries):
+    with _lock:
+        held = {entry["id"] for entry in _buffer}
+        _buffer.extend(entry for entry in entries if entry["id"] not in held)
+
+
+fleet.on("chat_stored", _add_shared)
+
+
+def recent():
+    """The buffered messages, oldest first. Warms the buffer on first use."""
+    if not _warmed:
+        warm()
+    with _lock:
+        return [dict(entry) for entry in _buffer]
+
+
+def older(before_id, limit=CHAT_HISTORY_SIZE):
+    """Up to `limit` persisted messages with message_id < before_id, oldest first."""
+    limit = max(1, min(int(limit), CHAT_PAGE_MAX))
+    return _query(OLDER_MESSAGES_SQL, {"before_id": int(before_id), "row_limit": limit})
@@ -0,0 +1,199 @@
+"""
+Write-behind persistence for chat messages.
+
+handle_message hands each message to enqueue() and broadcasts straight away.
+A background thread drains the queue and inserts messages with one
+executemany() and one commit per batch: every CHAT_FLUSH_BATCH messages, or
+CHAT_FLUSH_MS after the first message of a batch arrived, whichever is first.
+
+The queue is bounded. When it is full, enqueue() waits up to
+CHAT_ENQUEUE_TIMEOUT_MS and then refuses the message, and the caller tells the
+sender to retry. This stops a stalled database from growing memory without
+limit. stop() (also registered with atexit) drains and flushes whatever is
+still queued.
+
+Batches use batcherrors, so a row the database rejects is dropped on its own
+and the rest of its batch is still stored.
+"""
+import atexit
+import os
+import queue
+import threading
+import time
+
+import chat_history
+from db import get_connection
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CHAT_QUEUE_MAX = int(os.getenv("CHAT_QUEUE_MAX", "5000"))
+CHAT_FLUSH_BATCH = int(os.getenv("CHAT_FLUSH_BATCH", "100"))
+CHAT_FLUSH_MS = int(os.getenv("CHAT_FLUSH_MS", "200"))
+CHAT_ENQUEUE_TIMEOUT_MS = int(os.getenv("CHAT_ENQUEUE_TIMEOUT_MS", "50"))
+# Attempts per batch before it is dropped (and logged)
+CHAT_FLUSH_ATTEMPTS = 3
+# Column sizes of messages.message_text and messages.sender_name, in bytes
+MAX_MESSAGE_BYTES = 4000
+MAX_SENDER_BYTES = 100
+
+INSERT_MESSAGE_SQL = """
+    INSERT INTO messages (user_id, sender_name, message_text)
+    VALUES (:1, :2, :3)
+    RETURNING message_id INTO :4
+"""
+
+_queue = queue.Queue(maxsize=CHAT_QUEUE_MAX)
+_stop = threading.Event()
+_thread = None
+_thread_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {"enqueued": 0, "rejected": 0, "flushed": 0, "batches": 0, "dropped": 0, "last_flush_ms": 0.0}
+
+
+def _bump(**counts):
+    with _stats_lock:
+        for name, value in counts.items():
+            _stats[name] += value
+
+
+def _ensure_started():
+    global _thread
+    if _thread is None:
+        with _thread_lock:
+            if _thread is None:
+                _thread = threading.Thread(target=_run, name="chat-writer", daemon=True)
+                _thread.start()
+
+
+def message_too_long(message_text):
+    return len(message_text.encode("utf-8")) > MAX_MESSAGE_BYTES
+
+
+def _truncate(text, max_bytes):
+    if text is None:
+        return None
+    return text.encode("utf-8")[:max_bytes].decode("utf-8", "ignore")
+
+
+def enqueue(user_id, sender_name, message_text, entry=None):
+    """
+    Queue one message for persistence. Returns False if the queue stayed full.
+    If a chat history entry is passed, its "id" is set once the row is stored.
+    Callers should reject messages for which message_too_long() is true; any
+    that get here are cut to fit, as are long sender names.
+    """
+    if _stop.is_set():
+        return False
+    _ensure_started()
+    try:
+        _queue.put((user_id, _truncate(sender_name, MAX_SENDER_BYTES),
+                    _truncate(message_text, MAX_MESSAGE_BYTES), entry),
+                   timeout=CHAT_ENQUEUE_TIMEOUT_MS / 1000.0)
+    except queue.Full:
+        _bump(rejected=1)
+        return False
+    _bump(enqueued=1)
+    return True
+
+
+def _next_batch():
+    """Block for the first message, then collect more until the batch is full or its time is up."""
+    try:
+        batch = [_queue.get(timeout=0.5)]
+    except queue.Empty:
+        return []
+
+    deadline = time.monotonic() + CHAT_FLUSH_MS / 1000.0
+    while len(batch) < CHAT_FLUSH_BATCH:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(_queue.get(timeout=remaining))
+        except queue.Empty:
+            break
+    return batch
+
+
+def _flush(batch):
+    started = time.perf_counter()
+    for attempt in range(1, CHAT_FLUSH_ATTEMPTS + 1):
+        try:
+            conn = get_connection()
+            try:
+                cur = conn.cursor()
+                ids = cur.var(int, arraysize=len(batch))
+                cur.setinputsizes(None, None, None, ids)
+                cur.executemany(INSERT_MESSAGE_SQL, [item[:3] for item in batch], batcherrors=True)
+                rejected = {error.offset: error.message for error in cur.getbatcherrors()}
+                conn.commit()
+                cur.close()
+            finally:
+                conn.close()
+            break
+        except Exception as e:
+            print(f"❌ Error saving {len(batch)} chat messages (attempt {attempt}): {e}")
+            if attempt == CHAT_FLUSH_ATTEMPTS:
+                _bump(dropped=len(batch))
+                return
+            time.sleep(0.2 * attempt)
+
+    for offset, message in rejected.items():
+        print(f"❌ Chat message from user {batch[offset][0]} rejected: {message}")
+    if rejected:
+        _bump(dropped=len(rejected))
+
+    # Hand the generated ids to the history buffer, so clients can page back
+    # from them, and pass the stored messages on to the other workers
+    stored = []
+    for i, (_, _, _, entry) in enumerate(batch):
+        if entry is not None and i not in rejected:
+            entry["id"] = ids.getvalue(i)[0]
+            stored.append(dict(entry))
+    chat_history.share(stored)
+
+    with _stats_lock:
+        _stats["flushed"] += len(batch) - len(rejected)
+        _stats["batches"] += 1
+        _stats["last_flush_ms"] = (time.perf_counter() - started) * 1000
+
+
+def _run():
+    while not _stop.is_set():
+        batch = _next_batch()
+        if batch:
+            _flush(batch)
+
+
+def _drain():
+    batch = []
+    while True:
+        try:
+            batch.append(_queue.get_nowait())
+        except queue.Empty:
+            break
+        if len(batch) >= CHAT_FLUSH_BATCH:
+            _flush(batch)
+            batch = []
+    if batch:
+        _flush(batch)
+
+
+def stop(timeout=5.0):
+    """Stop accepting messages and flush everything still queued."""
+    _stop.set()
+    if _thread is not None:
+        _thread.join(timeout)
+    _drain()
+
+
+def writer_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["queued"] = _queue.qsize()
+    stats["capacity"] = CHAT_QUEUE_MAX
+    return stats
+
+
+atexit.register(stop)
@@ -0,0 +1,90 @@
+"""
+One-shot cleanup of duplicate asteroid_approach rows.
+
+Before approach writes became a MERGE on (asteroid_id, epoch_date_close_approach)
+every scheduled fetch appended a fresh copy of each approach. This keeps the
+newest row per natural key, deletes the rest and then adds a unique index so
+duplicates cannot come back.
+
+    python compact_approaches.py            # dedup and report rows reclaimed
+    python compact_approaches.py --dry-run  # only count duplicates
+"""
+import argparse
+from db import get_connection
+
+COUNT_DUPLICATES_SQL = """
+    SELECT COUNT(*) - COUNT(DISTINCT asteroid_id || ':' || epoch_date_close_approach)
+    FROM asteroid_approach
+    WHERE epoch_date_close_approach IS NOT NULL
+"""
+
+DELETE_DUPLICATES_SQL = """
+    DELETE FROM asteroid_approach
+    WHERE ROWID IN (
+        SELECT rid FROM (
+            SELECT ROWID AS rid,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY asteroid_id, epoch_date_close_approach
+                       ORDER BY approach_id DESC
+                   ) AS rn
+            FROM asteroid_approach
+            WHERE epoch_date_close_approach IS NOT NULL
+        )
+        WHERE rn > 1
+    )
+"""
+
+CREATE_NATURAL_KEY_INDEX_SQL = """
+    DECLARE
+        e_index_exists EXCEPTION;
+        e_columns_indexed EXCEPTION;
+        PRAGMA EXCEPTION_INIT(e_index_exists, -00955);
+        PRAGMA EXCEPTION_INIT(e_columns_indexed, -01408);
+    BEGIN
+        EXECUTE IMMEDIATE '
+            CREATE UNIQUE INDEX ux_approach_natural_key
+            ON asteroid_approach (asteroid_id, epoch_date_close_approach)
+        ';
+    EXCEPTION
+        WHEN e_index_exists OR e_columns_indexed THEN
+            NULL;
+    END;
+"""
+
+
+def compact_approaches(dry_run=False):
+    """Delete duplicate approaches. Returns the number of rows reclaimed (or found, on a dry run)."""
+    conn = get_connection()
+    cur = conn.cursor()
+
+    try:
+        cur.execute(COUNT_DUPLICATES_SQL)
+        duplicates = cur.fetchone()[0]
+        print(f"🔍 Found {duplicates} duplicate approach rows")
+
+        if dry_run:
+            return duplicates
+
+        cur.execute(DELETE_DUPLICATES_SQL)
+        reclaimed = cur.rowcount
+        conn.commit()
+        print(f"🧹 Reclaimed {reclaimed} rows from asteroid_approach")
+
+        print("🛠 Ensuring unique index on (asteroid_id, epoch_date_close_approach)...")
+        cur.execute(CREATE_NATURAL_KEY_INDEX_SQL)
+        print("✅ Natural key index ready.")
+        return reclaimed
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Compaction failed: {e}")
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Remove duplicate asteroid_approach rows.")
+    parser.add_argument("--dry-run", action="store_true", help="count duplicates without deleting")
+    args = parser.parse_args()
+    compact_approaches(dry_run=args.dry_run)
@@ -1,25 +1,84 @@
 import oracledb
 import os
+import threading
+import time
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Session pool sizing. Every request handler borrows from this one pool instead
+# of doing its own connect() handshake.
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "2"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+DB_POOL_INCREMENT = int(os.getenv("DB_POOL_INCREMENT", "1"))
+# Seconds a connection may sit idle in the pool before it is pinged on acquire.
+# 0 pings on every acquire, a negative value disables the check.
+DB_POOL_PING_INTERVAL = int(os.getenv("DB_POOL_PING_INTERVAL", "60"))
+# Milliseconds to wait for a free connection when the pool is exhausted
+DB_POOL_WAIT_TIMEOUT = int(os.getenv("DB_POOL_WAIT_TIMEOUT", "5000"))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_stats = {
+    "acquires": 0,
+    "wait_ms_total": 0.0,
+    "wait_ms_max": 0.0,
+}
+
+
+def _create_pool():
+    params = oracledb.PoolParams(
+        min=DB_POOL_MIN,
+        max=DB_POOL_MAX,
+        increment=DB_POOL_INCREMENT,
+        ping_interval=DB_POOL_PING_INTERVAL,
+        getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+        wait_timeout=DB_POOL_WAIT_TIMEOUT,
+    )
+    params.parse_connect_string(os.getenv("DB_DSN"))
+
+    return oracledb.create_pool(
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        params=params,
+        tcp_connect_timeout=5.0  # 5 second connection timeout
+    )
+
+
+def get_pool():
+    """
+    Return the process-wide session pool, creating it on first use.
+    Raises oracledb.Error if the pool cannot be created.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = _create_pool()
+    return _pool
+
+
 def get_connection():
     """
-    Get a connection to the Oracle database with timeout.
+    Get a connection to the Oracle database from the session pool.
+    Calling close() on the returned connection releases it back to the pool.
     Raises oracledb.Error if connection fails.
     """
     try:
-        # Create connection parameters with timeout
-        params = oracledb.ConnectParams()
-        params.parse_connect_string(os.getenv("DB_DSN"))
-        
-        return oracledb.connect(
-            user=os.getenv("DB_USER"),
-            password=os.getenv("DB_PASSWORD"),
-            params=params,
-            tcp_connect_timeout=5.0  # 5 second connection timeout
-        )
+        pool = get_pool()
+        started = time.perf_counter()
+        conn = pool.acquire()
+        waited_ms = (time.perf_counter() - started) * 1000
+
+        with _stats_lock:
+            _stats["acquires"] += 1
+            _stats["wait_ms_total"] += waited_ms
+            _stats["wait_ms_max"] = max(_stats["wait_ms_max"], waited_ms)
+
+        return conn
     except oracledb.Error as e:
         error_obj, = e.args
         print(f"❌ Database Connection Failed: {error_obj.message}")
@@ -27,6 +86,52 @@ def get_connection():
         print(f"   User: {os.getenv('DB_USER')}")
         raise
 
+
+@contextmanager
+def connection():
+    """
+    Borrow a pooled connection for the duration of a with-block.
+    The connection is released back to the pool on exit, even on error.
+    """
+    conn = get_connection()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def pool_stats():
+    """
+    Snapshot of pool usage: busy/open connections and acquire wait times.
+    Returns None for the pool fields if the pool has not been created yet.
+    """
+    with _stats_lock:
+        acquires = _stats["acquires"]
+        wait_total = _stats["wait_ms_total"]
+        wait_max = _stats["wait_ms_max"]
+
+    pool = _pool
+    return {
+        "busy": pool.busy if pool is not None else None,
+        "open": pool.opened if pool is not None else None,
+        "min": DB_POOL_MIN,
+        "max": DB_POOL_MAX,
+        "acquires": acquires,
+        "wait_ms_total": round(wait_total, 3),
+        "wait_ms_avg": round(wait_total / acquires, 3) if acquires else 0.0,
+        "wait_ms_max": round(wait_max, 3),
+    }
+
+
+def close_pool():
+    """Close the session pool, e.g. on shutdown."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close(force=True)
+            _pool = None
+
+
 def test_connection():
     """
     Test if database connection is available.
@@ -34,7 +139,12 @@ def test_connection():
     """
     try:
         conn = get_connection()
-        conn.close()
+        try:
+            # A pooled connection is only pinged on acquire after
+            # DB_POOL_PING_INTERVAL idle seconds; make a real round trip
+            conn.ping()
+        finally:
+            conn.close()
         return True, "Database connection successful"
     except oracledb.Error as e:
         error_obj, = e.args
@@ -42,3 +152,18 @@ def test_connection():
     except Exception as e:
         return False, f"Database unavailable: {str(e)}"
 
+
+def run_off_hub(fn, *args):
+    """
+    Call fn(*args) on a native thread when eventlet has patched threading.
+    Growing the pool blocks the eventlet hub for as long as the connect takes
+    (indefinitely if the database accepts but never answers), so background
+    checks go through here to keep the worker serving. Otherwise just calls fn.
+    """
+    try:
+        from eventlet import patcher, tpool
+    except ImportError:
+        return fn(*args)
+    if patcher.is_monkey_patched("thread"):
+        return tpool.execute(fn, *args)
+    return fn(*args)
@@ -1,5 +1,7 @@
 from flask_socketio import SocketIO
 from flask_apscheduler import APScheduler
+from message_queue import socketio_options
 
-socketio = SocketIO(cors_allowed_origins="*")
+# SOCKETIO_MESSAGE_QUEUE lets several server processes share emits (see message_queue.py)
+socketio = SocketIO(**socketio_options())
 scheduler = APScheduler()
@@ -0,0 +1,183 @@
+"""
+On-disk cache of raw NeoWs feed responses.
+
+Bodies are stored content-addressed (objects/<sha256>.json) and an index maps
+each date window to its current body plus the ETag/Last-Modified validators.
+Within FEED_CACHE_TTL seconds a window is served straight from disk; after
+that it is revalidated with a conditional GET, and a 304 just renews it.
+The cache is bounded to FEED_CACHE_MAX_BYTES by evicting least recently used
+windows.
+
+The index also remembers the hash of the payload each window was last
+ingested from, so callers can skip the DB write when nothing changed.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import neows
+from dotenv import load_dotenv
+
+load_dotenv()
+
+FEED_CACHE_DIR = os.getenv("FEED_CACHE_DIR", ".feed_cache")
+FEED_CACHE_TTL = int(os.getenv("FEED_CACHE_TTL", "3600"))
+FEED_CACHE_MAX_BYTES = int(os.getenv("FEED_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+STREAM_CHUNK_BYTES = 64 * 1024
+
+_lock = threading.RLock()
+_index = None
+
+
+def _index_path():
+    return os.path.join(FEED_CACHE_DIR, "index.json")
+
+
+def _object_path(digest):
+    return os.path.join(FEED_CACHE_DIR, "objects", f"{digest}.json")
+
+
+def _load_index():
+    global _index
+    if _index is None:
+        try:
+            with open(_index_path()) as f:
+                _index = json.load(f)
+        except (OSError, ValueError):
+            _index = {}
+        _index.setdefault("windows", {})
+        _index.setdefault("ingested", {})
+    return _index
+
+
+def _save_index():
+    os.makedirs(FEED_CACHE_DIR, exist_ok=True)
+    tmp_path = f"{_index_path()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(_index, f)
+    os.replace(tmp_path, _index_path())
+
+
+def _object_exists(digest):
+    return os.path.exists(_object_path(digest))
+
+
+def _write_object_stream(response):
+    """
+    Stream a response body to disk, hashing it on the way so the whole payload
+    never has to sit in memory. Returns (sha256, size).
+    """
+    os.makedirs(os.path.join(FEED_CACHE_DIR, "objects"), exist_ok=True)
+    hasher = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.join(FEED_CACHE_DIR, "objects"), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in response.iter_content(chunk_size=STREAM_CHUNK_BYTES):
+                hasher.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+        digest = hasher.hexdigest()
+        os.replace(tmp_path, _object_path(digest))
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return digest, size
+
+
+def _evict(keep=None):
+    """
+    Drop least recently used windows until the stored bodies fit the size
+    budget. The window named by `keep` is never evicted, since its caller is
+    about to read it.
+    """
+    windows = _index["windows"]
+    sizes = {}
+    for entry in windows.values():
+        sizes[entry["sha256"]] = entry["size"]
+
+    total = sum(sizes.values())
+    for key in sorted(windows, key=lambda k: windows[k]["last_access"]):
+        if total <= FEED_CACHE_MAX_BYTES:
+            break
+        if key == keep:
+            continue
+        digest = windows.pop(key)["sha256"]
+        # Bodies are shared between windows with identical content
+        if not any(entry["sha256"] == digest for entry in windows.values()):
+            total -= sizes[digest]
+            try:
+                os.remove(_object_path(digest))
+            except OSError:
+                pass
+
+
+def fetch_file(url, params, window):
+    """
+    Return (file, sha256) for a feed window: the cached body opened for binary
+    reading, which the caller closes. The cache is used when it is fresh and
+    revalidated when it is stale. The body is streamed straight to disk, so
+    callers can parse it incrementally. The file is opened under the cache
+    lock, so another thread's eviction can't remove it first.
+    """
+    key = f"{window[0]}:{window[1]}"
+    now = time.time()
+
+    with _lock:
+        entry = _load_index()["windows"].get(key)
+        cached = entry is not None and _object_exists(entry["sha256"])
+        if cached and now - entry["fetched_at"] < FEED_CACHE_TTL:
+            entry["last_access"] = now
+            _save_index()
+            return open(_object_path(entry["sha256"]), "rb"), entry["sha256"]
+
+    headers = {}
+    if cached:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    response = neows.get(url, params, headers=headers or None, stream=True)
+    try:
+        if response.status_code == 304 and cached:
+            digest, size = entry["sha256"], entry["size"]
+        else:
+            digest, size = _write_object_stream(response)
+    finally:
+        response.close()
+
+    with _lock:
+        _load_index()["windows"][key] = {
+            "sha256": digest,
+            "size": size,
+            "etag": response.headers.get("ETag") or (entry or {}).get("etag"),
+            "last_modified": response.headers.get("Last-Modified") or (entry or {}).get("last_modified"),
+            "fetched_at": now,
+            "last_access": now,
+        }
+        _evict(keep=key)
+        _save_index()
+        return open(_object_path(digest), "rb"), digest
+
+
+def fetch(url, params, window):
+    """Like fetch_file, but returns (body_bytes, sha256)."""
+    body, digest = fetch_file(url, params, window)
+    with body:
+        return body.read(), digest
+
+
+def already_ingested(window, digest):
+    """True if this exact payload was already written to the DB for this window."""
+    with _lock:
+        return _load_index()["ingested"].get(f"{window[0]}:{window[1]}") == digest
+
+
+def mark_ingested(window, digest):
+    with _lock:
+        _load_index()["ingested"][f"{window[0]}:{window[1]}"] = digest
+        _save_index()
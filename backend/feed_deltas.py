@@ -0,0 +1,167 @@
+"""
+Versioned change log behind the feed_update socket event.
+
+Each ingest publishes one delta: the approaches it inserted or changed (as a
+compact fields/rows table), approaches removed by archival, and the new
+dashboard stats. Deltas are numbered; the socket event carries the latest one,
+and a client that missed some can fetch everything since its last version from
+GET /api/feed/changes.
+
+The epoch and the version counter live in the feed_state table, so every
+worker numbers deltas the same way and a client can ask any of them. Each
+worker keeps the last FEED_DELTA_HISTORY deltas in memory: its own, and those
+the other workers publish (see fleet.py). A worker that cannot return every
+delta a client missed (it started since, or the epoch changed) answers None,
+and the client reloads from /api/asteroids.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+import fleet
+from db import get_connection
+from dotenv import load_dotenv
+
+load_dotenv()
+
+FEED_DELTA_HISTORY = int(os.getenv("FEED_DELTA_HISTORY", "50"))
+# Larger changes (backfills, re-scoring) are announced as a full refresh
+FEED_DELTA_MAX_ROWS = int(os.getenv("FEED_DELTA_MAX_ROWS", "2000"))
+
+# approach_id is the key of the rows /api/asteroids returns
+UPSERT_FIELDS = ("approach_id", "asteroid_id", "name", "approach_date", "epoch_date",
+                 "diameter", "velocity", "miss_distance", "risk_score")
+
+FEED_NAME = "feed"
+
+LOAD_STATE_SQL = "SELECT epoch, version FROM feed_state WHERE feed_name = :feed_name"
+
+NEXT_VERSION_SQL = """
+    UPDATE feed_state SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+    WHERE feed_name = :feed_name
+    RETURNING epoch, version INTO :epoch, :version
+"""
+
+_lock = threading.Lock()
+_epoch = None       # unknown until load() or the first delta
+_version = 0
+_log = deque(maxlen=FEED_DELTA_HISTORY)
+_emit = None
+
+
+def init_feed_deltas(emit):
+    """emit(delta) broadcasts one delta as the feed_update event."""
+    global _emit
+    _emit = emit
+
+
+def load():
+    """Read the fleet's current epoch and version. Called once the DB is reachable."""
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(LOAD_STATE_SQL, {"feed_name": FEED_NAME})
+        row = cur.fetchone()
+    finally:
+        cur.close()
+        conn.close()
+    if row is not None:
+        with _lock:
+            _advance(*row)
+
+
+def _next_version():
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        epoch, version = cur.var(str), cur.var(int)
+        cur.execute(NEXT_VERSION_SQL, {"feed_name": FEED_NAME, "epoch": epoch, "version": version})
+        conn.commit()
+        return epoch.getvalue()[0], version.getvalue()[0]
+    finally:
+        cur.close()
+        conn.close()
+
+
+def _advance(epoch, version):
+    """Move to (epoch, version) if it is newer. Call with _lock held."""
+    global _epoch, _version
+    if epoch != _epoch:
+        # A new epoch (the feed_state row was reset) makes the old log meaningless
+        _epoch, _version = epoch, 0
+        _log.clear()
+    _version = max(_version, version)
+
+
+def _record(delta):
+    """Add a delta to the log, in version order; deltas from other workers can arrive late."""
+    with _lock:
+        _advance(delta["epoch"], delta["version"])
+        if any(d["version"] == delta["version"] for d in _log):
+            return
+        if _log and _log[-1]["version"] > delta["version"]:
+            deltas = sorted([*_log, delta], key=lambda d: d["version"])
+            _log.clear()
+            _log.extend(deltas)
+        else:
+            _log.append(delta)
+
+
+def publish(upserts=(), removed_before=None, stats=None, full_refresh=False):
+    """
+    Number a delta, record it on every worker and broadcast it. `upserts` are
+    tuples in UPSERT_FIELDS order. Returns the delta, or None if no version
+    could be taken (clients then pick the change up with the next delta).
+    """
+    upserts = list(upserts)
+    if len(upserts) > FEED_DELTA_MAX_ROWS:
+        upserts, full_refresh = [], True
+
+    try:
+        epoch, version = _next_version()
+    except Exception as e:
+        print(f"❌ Could not publish feed delta: {e}")
+        return None
+
+    delta = {
+        "epoch": epoch,
+        "version": version,
+        "published_at": time.time(),
+        "message": "New data available",
+        "full_refresh": full_refresh,
+        "upserts": {"fields": UPSERT_FIELDS, "rows": upserts},
+        "removed_before": removed_before,
+        "stats": stats,
+    }
+    _record(delta)
+    fleet.publish("feed_delta", delta)
+
+    if _emit is not None:
+        _emit(delta)
+    return delta
+
+
+def changes_since(version, epoch=None):
+    """
+    Deltas newer than `version`, oldest first, or None if they are no longer
+    all available (the client has to reload).
+    """
+    with _lock:
+        if _epoch is None or (epoch is not None and epoch != _epoch):
+            return None
+        if version >= _version:
+            return []
+        newer = [delta for delta in _log if delta["version"] > version]
+        # Every version up to the latest must be here, with no gaps
+        if len(newer) != _version - version:
+            return None
+        return newer
+
+
+def current_version():
+    with _lock:
+        return {"epoch": _epoch, "version": _version}
+
+
+fleet.on("feed_delta", _record)
@@ -0,0 +1,54 @@
+"""
+Local stand-in for the NeoWs feed endpoint, for exercising backfills offline.
+
+Serves recorded pages from a directory, one file per window named
+<start_date>_<end_date>.json. Windows without a recording get an empty feed.
+
+    python feed_stub_server.py recordings/ --port 8099
+    python backfill.py --from 2024-01-01 --to 2024-02-01 --feed-url http://localhost:8099/feed
+"""
+import argparse
+import json
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+def make_handler(recordings_dir):
+    class FeedHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)
+            start = query.get("start_date", [""])[0]
+            end = query.get("end_date", [start])[0]
+
+            path = os.path.join(recordings_dir, f"{start}_{end}.json")
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    body = f.read()
+            else:
+                body = json.dumps({"element_count": 0, "near_earth_objects": {}}).encode("utf-8")
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FeedHandler
+
+
+def serve(recordings_dir, port=8099):
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(recordings_dir))
+    print(f"🛰  Serving recorded feeds from {recordings_dir} on http://127.0.0.1:{port}/feed")
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve recorded NeoWs feed pages locally.")
+    parser.add_argument("recordings_dir")
+    parser.add_argument("--port", type=int, default=8099)
+    args = parser.parse_args()
+    serve(args.recordings_dir, args.port).serve_forever()
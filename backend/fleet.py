@@ -0,0 +1,90 @@
+"""
+Worker-to-worker events over the Socket.IO message queue.
+
+Some state is kept per process (the response cache, the chat history buffer,
+the feed delta log), and a change made on one worker has to reach the others.
+publish(event, payload) sends the payload to every other worker, where the
+handlers registered with on(event, handler) run. The publishing worker is
+expected to have applied the change itself already.
+
+The events travel as emits to FLEET_NAMESPACE, which no client connects to,
+over the same queue (SOCKETIO_MESSAGE_QUEUE) as the client emits. Handlers run
+on the queue's listener thread, so they must be quick and must not touch the
+database; schedule anything slower. Without a message queue there is only one
+worker and publish() does nothing. Payloads go through JSON: tuples arrive as
+lists.
+"""
+import threading
+
+import socketio
+
+FLEET_NAMESPACE = "/_fleet"
+
+_lock = threading.Lock()
+_handlers = {}      # event -> [handler(payload)]
+_manager = None
+_stats = {"published": 0, "received": 0, "handler_errors": 0}
+
+
+def on(event, handler):
+    """Run handler(payload) when another worker publishes `event`."""
+    with _lock:
+        _handlers.setdefault(event, []).append(handler)
+
+
+def _dispatch(event, payload):
+    with _lock:
+        handlers = list(_handlers.get(event, ()))
+        _stats["received"] += 1
+    for handler in handlers:
+        try:
+            handler(payload)
+        except Exception as e:
+            with _lock:
+                _stats["handler_errors"] += 1
+            print(f"❌ Fleet event {event} failed: {e}")
+
+
+def init_fleet(server):
+    """
+    Hook into the python-socketio server's queue manager (socketio.server
+    after init_app). Only pub/sub managers reach other workers.
+    """
+    global _manager
+    manager = server.manager
+    if not isinstance(manager, socketio.PubSubManager) or _manager is manager:
+        return
+
+    forward = manager._handle_emit
+
+    def handle_emit(message):
+        if message.get("namespace") != FLEET_NAMESPACE:
+            return forward(message)
+        # The publisher has already applied its own event
+        if message.get("host_id") != manager.host_id:
+            data = message.get("data") or [None]
+            _dispatch(message["event"], data[0])
+
+    manager._handle_emit = handle_emit
+    # The queue listener normally starts with the first client connection;
+    # a worker has to hear fleet events before any client connects
+    if not server.manager_initialized:
+        server.manager_initialized = True
+        manager.initialize()
+    _manager = manager
+
+
+def publish(event, payload=None):
+    """Send an event to every other worker. Does nothing with a single worker."""
+    if _manager is None:
+        return
+    with _lock:
+        _stats["published"] += 1
+    _manager.emit(event, payload, namespace=FLEET_NAMESPACE)
+
+
+def fleet_stats():
+    with _lock:
+        stats = dict(_stats)
+    stats["connected"] = _manager is not None
+    return stats
@@ -0,0 +1,199 @@
+"""
+Health state kept in memory by a background prober.
+
+A daemon thread pings the database every HEALTH_PROBE_SECONDS and reads the
+latest scheduled job runs from job_runs. The health routes only read that
+snapshot plus the in-memory pool counters, so a load-balancer probe costs no
+DB round trip and no logon.
+
+    liveness   the process is up and serving requests; no checks
+    readiness  the last probe reached the DB, the probe is not stale and the
+               pool is not saturated
+
+Overdue scheduled jobs and a stale NASA feed are reported as "degraded" but do
+not fail readiness: they are fleet-wide problems, and taking every instance
+out of the load balancer would turn stale data into an outage.
+"""
+import os
+import threading
+import time
+from datetime import datetime
+
+import job_locks
+from db import get_connection, pool_stats, run_off_hub, test_connection
+from dotenv import load_dotenv
+
+load_dotenv()
+
+HEALTH_PROBE_SECONDS = float(os.getenv("HEALTH_PROBE_SECONDS", "15"))
+# Busy connections / pool max at or above which the worker reports not ready
+HEALTH_POOL_SATURATION = float(os.getenv("HEALTH_POOL_SATURATION", "0.9"))
+# Two missed 6-hourly ingests plus an hour of slack
+HEALTH_NASA_MAX_AGE = int(os.getenv("HEALTH_NASA_MAX_AGE", str(13 * 3600)))
+NASA_JOB = "update_data"
+
+# The DB's own clock, so ages don't depend on the app and DB agreeing on a timezone
+LAST_RUNS_SQL = """
+    SELECT job_name, MAX(started_at),
+           MAX(CASE WHEN outcome = 'success' THEN finished_at END),
+           CAST(SYSTIMESTAMP AS TIMESTAMP)
+    FROM job_runs
+    GROUP BY job_name
+"""
+
+_lock = threading.Lock()
+_thread = None
+_thread_lock = threading.Lock()
+_stop = threading.Event()
+_state = {
+    "probed_at": None,        # datetime of the last completed probe
+    "probed_mono": None,      # monotonic time of the same, for staleness
+    "probe_ms": None,
+    "database": {"available": False, "message": "Not probed yet"},
+    "jobs": {},               # job_name -> last run times and their ages when read
+    "jobs_mono": None,        # monotonic time the jobs were read
+    "jobs_error": None,
+}
+_stats = {"probes": 0, "probe_failures": 0}
+
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+def _age_seconds(value, now):
+    return (now - value).total_seconds() if value is not None else None
+
+
+def _last_runs():
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(LAST_RUNS_SQL)
+        return {name: {"last_started": started, "last_success": succeeded,
+                       "started_age": _age_seconds(started, db_now),
+                       "success_age": _age_seconds(succeeded, db_now)}
+                for name, started, succeeded, db_now in cur}
+    finally:
+        cur.close()
+        conn.close()
+
+
+def probe():
+    """Check the database and read the latest job runs; served until the next probe."""
+    started = time.monotonic()
+    available, message = run_off_hub(test_connection)
+    jobs, jobs_error = {}, None
+    if available:
+        try:
+            jobs = run_off_hub(_last_runs)
+        except Exception as e:
+            jobs_error = str(e)
+
+    with _lock:
+        _state["probed_at"] = datetime.now()
+        _state["probed_mono"] = time.monotonic()
+        _state["probe_ms"] = round((_state["probed_mono"] - started) * 1000, 1)
+        _state["database"] = {"available": available, "message": message}
+        # Keep the last known runs if the DB is down; the timestamps say how old they are
+        if available:
+            _state["jobs"] = jobs
+            _state["jobs_mono"] = _state["probed_mono"]
+            _state["jobs_error"] = jobs_error
+        _stats["probes"] += 1
+        if not available:
+            _stats["probe_failures"] += 1
+
+
+def _run():
+    while not _stop.is_set():
+        try:
+            probe()
+        except Exception as e:
+            print(f"❌ Health probe failed: {e}")
+        _stop.wait(HEALTH_PROBE_SECONDS)
+
+
+def start():
+    """Start the background prober (once per process)."""
+    global _thread
+    if _thread is None:
+        with _thread_lock:
+            if _thread is None:
+                _thread = threading.Thread(target=_run, name="health-probe", daemon=True)
+                _thread.start()
+
+
+def liveness():
+    return {"status": "alive"}
+
+
+def readiness():
+    """(ready, report) built from the last probe and the live pool counters."""
+    with _lock:
+        state = dict(_state)
+        stats = dict(_stats)
+
+    now = time.monotonic()
+    probe_age = (now - state["probed_mono"]) if state["probed_mono"] is not None else None
+
+    def age_now(age_when_read):
+        if age_when_read is None:
+            return None
+        return round(age_when_read + now - state["jobs_mono"])
+
+    fresh = probe_age is not None and probe_age < 3 * HEALTH_PROBE_SECONDS
+    database = dict(state["database"], ok=state["database"]["available"] and fresh,
+                    probed_at=_iso(state["probed_at"]), probe_ms=state["probe_ms"])
+    if probe_age is not None and not fresh:
+        database["message"] = f"Health probe stalled ({round(probe_age)}s since the last one)"
+
+    pool = pool_stats()
+    saturation = (pool["busy"] / pool["max"]) if pool["busy"] is not None and pool["max"] else 0.0
+    pool["saturation"] = round(saturation, 3)
+    pool["ok"] = saturation < HEALTH_POOL_SATURATION
+
+    intervals = job_locks.job_intervals()
+    jobs = {}
+    for name, run in state["jobs"].items():
+        age = age_now(run["started_age"])
+        interval = intervals.get(name)
+        jobs[name] = {
+            "last_started": _iso(run["last_started"]),
+            "last_success": _iso(run["last_success"]),
+            "interval_seconds": interval,
+            "overdue": interval is not None and age is not None and age > 2 * interval,
+        }
+    scheduler = {
+        "leader": job_locks.is_leader(),
+        "jobs": jobs,
+        "error": state["jobs_error"],
+        "ok": state["jobs_error"] is None and not any(job["overdue"] for job in jobs.values()),
+    }
+
+    nasa_run = state["jobs"].get(NASA_JOB, {})
+    fetch_age = age_now(nasa_run.get("success_age"))
+    nasa = {
+        "last_fetch": _iso(nasa_run.get("last_success")),
+        "age_seconds": fetch_age,
+        "max_age_seconds": HEALTH_NASA_MAX_AGE,
+        "ok": fetch_age is not None and fetch_age <= HEALTH_NASA_MAX_AGE,
+    }
+
+    ready = database["ok"] and pool["ok"]
+    if not ready:
+        status = "unavailable"
+    elif scheduler["ok"] and nasa["ok"]:
+        status = "ok"
+    else:
+        status = "degraded"
+
+    return ready, {
+        "status": status,
+        "ready": ready,
+        "database": database,
+        "pool": pool,
+        "scheduler": scheduler,
+        "nasa": nasa,
+        "probes": stats,
+    }
@@ -0,0 +1,282 @@
+"""
+Leader election and run history for the scheduled jobs.
+
+Every worker runs the scheduler, but fleet-wide jobs (NASA ingest, archival,
+re-scoring, alerts) only do work on the leader: the worker holding the
+"scheduler" row of job_leases. Each worker tries to take or renew that lease
+every SCHEDULER_LEASE_RENEW seconds. A worker that shuts down releases it; one
+that dies just stops renewing, and another worker takes over once the lease
+runs out SCHEDULER_LEASE_SECONDS later. A leader that cannot reach the DB
+stops acting as leader as soon as its own lease would have expired.
+
+Jobs wrapped with leader_job() start a run only while holding the lease row
+locked, and interval jobs check job_runs instead of trusting their local timer,
+so a new leader does not repeat a job the old one ran recently. Every run is
+recorded in job_runs with its holder, duration and outcome.
+"""
+import atexit
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import oracledb
+from db import get_connection
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LEADER_LEASE = "scheduler"
+SCHEDULER_LEASE_SECONDS = int(os.getenv("SCHEDULER_LEASE_SECONDS", "60"))
+SCHEDULER_LEASE_RENEW = int(os.getenv("SCHEDULER_LEASE_RENEW", "15"))
+# Interval jobs check whether they are due this often, so after a handover a
+# job starts at most this late
+JOB_DUE_CHECK_SECONDS = int(os.getenv("JOB_DUE_CHECK_SECONDS", "300"))
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# Take the lease if it is free or expired, or extend it if we already hold it.
+# Workers inserting the very first row race on the primary key.
+ACQUIRE_LEASE_SQL = """
+    MERGE INTO job_leases l
+    USING (SELECT :job_name AS job_name FROM dual) s
+    ON (l.job_name = s.job_name)
+    WHEN MATCHED THEN UPDATE SET
+        l.acquired_at = CASE WHEN l.holder = :holder THEN l.acquired_at ELSE SYSTIMESTAMP END,
+        l.holder = :holder,
+        l.lease_until = SYSTIMESTAMP + NUMTODSINTERVAL(:lease_seconds, 'SECOND')
+        WHERE l.holder = :holder OR l.lease_until < SYSTIMESTAMP
+    WHEN NOT MATCHED THEN INSERT (job_name, holder, acquired_at, lease_until)
+        VALUES (s.job_name, :holder, SYSTIMESTAMP,
+                SYSTIMESTAMP + NUMTODSINTERVAL(:lease_seconds, 'SECOND'))
+"""
+
+RELEASE_LEASE_SQL = """
+    UPDATE job_leases SET lease_until = SYSTIMESTAMP
+    WHERE job_name = :job_name AND holder = :holder
+"""
+
+# Held until the run is recorded, so a worker whose lease has just been taken
+# over cannot start a run
+HOLD_LEASE_SQL = """
+    SELECT 1 FROM job_leases
+    WHERE job_name = :job_name AND holder = :holder AND lease_until > SYSTIMESTAMP
+    FOR UPDATE
+"""
+
+RECENT_RUNS_SQL = """
+    SELECT COUNT(*) FROM job_runs
+    WHERE job_name = :job_name
+    AND started_at > SYSTIMESTAMP - NUMTODSINTERVAL(:interval_seconds, 'SECOND')
+"""
+
+START_RUN_SQL = """
+    INSERT INTO job_runs (job_name, holder, started_at, outcome)
+    VALUES (:job_name, :holder, SYSTIMESTAMP, 'running')
+    RETURNING run_id INTO :run_id
+"""
+
+FINISH_RUN_SQL = """
+    UPDATE job_runs
+    SET finished_at = SYSTIMESTAMP, duration_ms = :duration_ms, outcome = :outcome, error = :error
+    WHERE run_id = :run_id
+"""
+
+_lock = threading.Lock()
+_lease_expires = 0.0    # monotonic deadline of our leader lease, 0 when not leader
+_was_leader = False
+_on_elected = []
+_intervals = {}         # job_name -> interval_seconds of the interval leader jobs
+_stats = {"renewals": 0, "elections": 0, "demotions": 0, "renew_errors": 0,
+          "runs": 0, "failed_runs": 0, "skipped_not_due": 0}
+
+
+def is_leader():
+    return _lease_expires > time.monotonic()
+
+
+def on_elected(callback):
+    """Call `callback()` every time this worker becomes the leader."""
+    _on_elected.append(callback)
+
+
+def _acquire(job_name, lease_seconds):
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(ACQUIRE_LEASE_SQL, {"job_name": job_name, "holder": WORKER_ID,
+                                        "lease_seconds": lease_seconds})
+        acquired = cur.rowcount == 1
+        conn.commit()
+        return acquired
+    except oracledb.IntegrityError:
+        # Another worker inserted the first lease row at the same time
+        conn.rollback()
+        return False
+    finally:
+        cur.close()
+        conn.close()
+
+
+def heartbeat():
+    """Take or renew the leader lease. Runs on every worker every SCHEDULER_LEASE_RENEW seconds."""
+    global _lease_expires, _was_leader
+    # Measured before the round trip, so our deadline never outlives the DB's
+    started = time.monotonic()
+    try:
+        acquired = _acquire(LEADER_LEASE, SCHEDULER_LEASE_SECONDS)
+    except Exception as e:
+        # Keep whatever lease we have until it runs out; nobody else can take it sooner
+        print(f"❌ Scheduler lease renewal failed: {e}")
+        acquired = None
+
+    with _lock:
+        if acquired:
+            _lease_expires = started + SCHEDULER_LEASE_SECONDS
+            _stats["renewals"] += 1
+        elif acquired is False:
+            _lease_expires = 0.0
+        else:
+            _stats["renew_errors"] += 1
+        leader = is_leader()
+        elected = leader and not _was_leader
+        demoted = _was_leader and not leader
+        _was_leader = leader
+        if elected:
+            _stats["elections"] += 1
+        if demoted:
+            _stats["demotions"] += 1
+
+    if elected:
+        print(f"👑 {WORKER_ID} is now the scheduler leader")
+        for callback in _on_elected:
+            callback()
+    elif demoted:
+        print(f"ℹ️  {WORKER_ID} is no longer the scheduler leader")
+
+
+def release():
+    """Give up the leader lease so another worker can take over immediately."""
+    global _lease_expires, _was_leader
+    with _lock:
+        if not _was_leader:
+            return
+        _lease_expires = 0.0
+        _was_leader = False
+    try:
+        conn = get_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute(RELEASE_LEASE_SQL, {"job_name": LEADER_LEASE, "holder": WORKER_ID})
+            conn.commit()
+        finally:
+            cur.close()
+            conn.close()
+        print("👋 Scheduler lease released")
+    except Exception as e:
+        print(f"❌ Scheduler lease release failed: {e}")
+
+
+def init_job_locks(scheduler):
+    """Start competing for the leader lease now and release it at exit."""
+    scheduler.add_job(id="scheduler_lease", func=heartbeat, trigger="interval",
+                      seconds=SCHEDULER_LEASE_RENEW, next_run_time=datetime.now())
+    atexit.register(release)
+
+
+def _start_run(job_name, interval_seconds):
+    """Record a run of job_name and return its run_id, or None if we may not run it now."""
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(HOLD_LEASE_SQL, {"job_name": LEADER_LEASE, "holder": WORKER_ID})
+        if cur.fetchone() is None:
+            conn.rollback()
+            return None
+        if interval_seconds:
+            cur.execute(RECENT_RUNS_SQL, {"job_name": job_name, "interval_seconds": interval_seconds})
+            if cur.fetchone()[0]:
+                conn.rollback()
+                with _lock:
+                    _stats["skipped_not_due"] += 1
+                return None
+        run_id = cur.var(int)
+        cur.execute(START_RUN_SQL, {"job_name": job_name, "holder": WORKER_ID, "run_id": run_id})
+        conn.commit()
+        return run_id.getvalue()[0]
+    finally:
+        cur.close()
+        conn.close()
+
+
+def _finish_run(run_id, duration_ms, outcome, error):
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(FINISH_RUN_SQL, {"run_id": run_id, "duration_ms": round(duration_ms),
+                                     "outcome": outcome, "error": error})
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+
+
+def leader_job(job_name, func, interval_seconds=None):
+    """
+    Wrap `func` for the scheduler so it only runs on the leader and every run
+    is recorded. With interval_seconds it runs at most once per interval
+    across the fleet; schedule the wrapper every due_check_seconds(interval)
+    rather than every interval. `func` signals failure by raising.
+    """
+    if interval_seconds:
+        _intervals[job_name] = interval_seconds
+
+    def run():
+        if not is_leader():
+            return
+        try:
+            run_id = _start_run(job_name, interval_seconds)
+        except Exception as e:
+            print(f"❌ Could not start {job_name}: {e}")
+            return
+        if run_id is None:
+            return
+
+        started = time.monotonic()
+        outcome, error = "success", None
+        try:
+            func()
+        except Exception as e:
+            outcome, error = "failed", str(e)[:4000]
+        with _lock:
+            _stats["runs"] += 1
+            if error is not None:
+                _stats["failed_runs"] += 1
+
+        try:
+            _finish_run(run_id, (time.monotonic() - started) * 1000, outcome, error)
+        except Exception as e:
+            print(f"❌ Could not record {job_name} run {run_id}: {e}")
+
+    run.__name__ = job_name
+    return run
+
+
+def due_check_seconds(interval_seconds):
+    """How often to schedule a leader_job with this interval."""
+    return min(interval_seconds, JOB_DUE_CHECK_SECONDS)
+
+
+def job_intervals():
+    """{job_name: interval_seconds} of the interval jobs registered on this worker."""
+    return dict(_intervals)
+
+
+def job_lock_stats():
+    with _lock:
+        stats = dict(_stats)
+    stats["worker_id"] = WORKER_ID
+    stats["leader"] = is_leader()
+    return stats
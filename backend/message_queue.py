@@ -0,0 +1,107 @@
+"""
+Socket.IO message queue selection.
+
+With several server processes, an emit made on one (e.g. an alert from the
+scheduler worker) has to reach clients connected to the others. Flask-SocketIO
+does this through a pub/sub "client manager". SOCKETIO_MESSAGE_QUEUE selects
+the backend:
+
+    (unset)          single process, no queue
+    redis://...      Redis pub/sub
+    kafka://...      Kafka
+    zmq+tcp://...    ZeroMQ (needs a zmq forwarder)
+    amqp://...       RabbitMQ or anything else Kombu supports
+    loopback://      in-process queue: every server in this process shares
+                     it, which is enough to test fan-out without services
+
+    python message_queue.py   # self-check: two servers on the loopback queue
+"""
+import json
+import os
+import queue
+import threading
+
+import socketio
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SOCKETIO_MESSAGE_QUEUE = os.getenv("SOCKETIO_MESSAGE_QUEUE", "")
+SOCKETIO_CHANNEL = os.getenv("SOCKETIO_CHANNEL", "cosmic-watch")
+# eventlet, gevent or threading; unset lets Flask-SocketIO pick the best installed
+SOCKETIO_ASYNC_MODE = os.getenv("SOCKETIO_ASYNC_MODE") or None
+
+_loopback_lock = threading.Lock()
+_loopback_subscribers = {}   # channel -> [queue.Queue]
+
+
+class LoopbackManager(socketio.PubSubManager):
+    """Pub/sub client manager whose "broker" is a set of in-process queues."""
+    name = "loopback"
+
+    def __init__(self, url="loopback://", channel="socketio", write_only=False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+
+    def _publish(self, data):
+        # Round-trip through JSON like a real broker, so nothing is shared by reference
+        message = json.dumps(data)
+        with _loopback_lock:
+            subscribers = list(_loopback_subscribers.get(self.channel, ()))
+        for subscriber in subscribers:
+            subscriber.put(message)
+
+    def _listen(self):
+        inbox = queue.Queue()
+        with _loopback_lock:
+            _loopback_subscribers.setdefault(self.channel, []).append(inbox)
+        while True:
+            yield inbox.get()
+
+
+def socketio_options(url=None, channel=None):
+    """Keyword arguments for SocketIO(...) for the configured queue backend."""
+    url = SOCKETIO_MESSAGE_QUEUE if url is None else url
+    channel = channel or SOCKETIO_CHANNEL
+    options = {"cors_allowed_origins": "*"}
+    if SOCKETIO_ASYNC_MODE:
+        options["async_mode"] = SOCKETIO_ASYNC_MODE
+
+    if url.startswith("loopback://"):
+        options["client_manager"] = LoopbackManager(url, channel=channel)
+    elif url:
+        options["message_queue"] = url
+        options["channel"] = channel
+    return options
+
+
+def _self_check():
+    """Emit on one server and check that a client of each server gets it."""
+    import time
+
+    received = {}
+    servers = []
+    for i in range(2):
+        server = socketio.Server(async_mode="threading",
+                                 client_manager=LoopbackManager(channel="self-check"))
+        # Stand in for a connected client: register it and capture its packets
+        server.manager_initialized = True
+        server.manager.initialize()
+        server.manager.connect(f"client-{i}", "/")
+        received[i] = []
+        server._send_eio_packet = lambda eio_sid, pkt, i=i: received[i].append(pkt.data)
+        servers.append(server)
+
+    time.sleep(0.2)   # let both listener threads subscribe
+    servers[0].emit("feed_update", {"version": 1})
+
+    deadline = time.monotonic() + 2
+    while time.monotonic() < deadline and not all(received.values()):
+        time.sleep(0.05)
+
+    for i, packets in received.items():
+        print(f"{'✅' if packets else '❌'} client of server {i} received: {packets}")
+    return all(received.values())
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if _self_check() else 1)
@@ -1,205 +1,532 @@
-import requests
+import json
+import alerts
+import feed_deltas
+import ijson
+import oracledb
 import os
+import time
 from datetime import datetime
+import feed_cache
+import response_cache
+import stats_summary
+import watchers
 from db import get_connection
+from risk import calculate_risk_batch, current_model
 from dotenv import load_dotenv
 
 load_dotenv()
 
 NASA_API_KEY = os.getenv("NASA_API_KEY")
-NASA_URL = "https://api.nasa.gov/neo/rest/v1/feed"
+NASA_URL = os.getenv("NASA_URL", "https://api.nasa.gov/neo/rest/v1/feed")
+# The feed endpoint rejects ranges longer than 7 days
+FEED_WINDOW_DAYS = 7
+# NEOs per array DML batch when streaming a feed into the DB
+FEED_BATCH_SIZE = int(os.getenv("FEED_BATCH_SIZE", "500"))
 
 
-def fetch_and_store_asteroids():
-    today = datetime.utcnow().strftime("%Y-%m-%d")
+# Bind variable sizes for the array DML below. Declaring them up front stops
+# oracledb from re-sizing its bind buffers as it walks the batch.
+ASTEROID_INPUT_SIZES = {
+    "asteroid_id": oracledb.DB_TYPE_NUMBER,
+    "neo_reference_id": 20,
+    "name": 100,
+    "nasa_jpl_url": 200,
+    "absolute_magnitude_h": oracledb.DB_TYPE_NUMBER,
+    "is_potentially_hazardous": 3,
+    "is_sentry_object": 3,
+    "est_diam_km_min": oracledb.DB_TYPE_NUMBER,
+    "est_diam_km_max": oracledb.DB_TYPE_NUMBER,
+    "est_diam_m_min": oracledb.DB_TYPE_NUMBER,
+    "est_diam_m_max": oracledb.DB_TYPE_NUMBER,
+    "est_diam_miles_min": oracledb.DB_TYPE_NUMBER,
+    "est_diam_miles_max": oracledb.DB_TYPE_NUMBER,
+    "est_diam_feet_min": oracledb.DB_TYPE_NUMBER,
+    "est_diam_feet_max": oracledb.DB_TYPE_NUMBER,
+}
+
+APPROACH_INPUT_SIZES = {
+    "asteroid_id": oracledb.DB_TYPE_NUMBER,
+    "approach_date": 10,
+    "approach_date_full": 30,
+    "epoch_date": oracledb.DB_TYPE_NUMBER,
+    "velocity_kmps": oracledb.DB_TYPE_NUMBER,
+    "velocity_kmph": oracledb.DB_TYPE_NUMBER,
+    "velocity_mph": oracledb.DB_TYPE_NUMBER,
+    "miss_au": oracledb.DB_TYPE_NUMBER,
+    "miss_lunar": oracledb.DB_TYPE_NUMBER,
+    "miss_km": oracledb.DB_TYPE_NUMBER,
+    "miss_miles": oracledb.DB_TYPE_NUMBER,
+    "orbiting_body": 20,
+    "risk_score": oracledb.DB_TYPE_NUMBER,
+    "risk_model_version": oracledb.DB_TYPE_NUMBER,
+}
+
+MERGE_ASTEROID_SQL = """
+    MERGE INTO asteroids a
+    USING dual
+    ON (a.asteroid_id = :asteroid_id)
+    WHEN NOT MATCHED THEN
+    INSERT (
+        asteroid_id,
+        neo_reference_id,
+        name,
+        nasa_jpl_url,
+        absolute_magnitude_h,
+        is_potentially_hazardous,
+        is_sentry_object,
+        est_diam_km_min,
+        est_diam_km_max,
+        est_diam_m_min,
+        est_diam_m_max,
+        est_diam_miles_min,
+        est_diam_miles_max,
+        est_diam_feet_min,
+        est_diam_feet_max
+    )
+    VALUES (
+        :asteroid_id,
+        :neo_reference_id,
+        :name,
+        :nasa_jpl_url,
+        :absolute_magnitude_h,
+        :is_potentially_hazardous,
+        :is_sentry_object,
+        :est_diam_km_min,
+        :est_diam_km_max,
+        :est_diam_m_min,
+        :est_diam_m_max,
+        :est_diam_miles_min,
+        :est_diam_miles_max,
+        :est_diam_feet_min,
+        :est_diam_feet_max
+    )
+"""
+
+# Approaches are keyed on (asteroid_id, epoch_date_close_approach), so
+# re-ingesting a window updates rows in place instead of appending duplicates.
+MERGE_APPROACH_SQL = """
+    MERGE INTO asteroid_approach aa
+    USING (
+        SELECT :asteroid_id AS asteroid_id, :epoch_date AS epoch_date FROM dual
+    ) src
+    ON (aa.asteroid_id = src.asteroid_id
+        AND aa.epoch_date_close_approach = src.epoch_date)
+    WHEN MATCHED THEN
+    UPDATE SET
+        approach_date = TO_DATE(:approach_date, 'YYYY-MM-DD'),
+        approach_date_full = :approach_date_full,
+        velocity_kmps = :velocity_kmps,
+        velocity_kmph = :velocity_kmph,
+        velocity_mph = :velocity_mph,
+        miss_distance_au = :miss_au,
+        miss_distance_lunar = :miss_lunar,
+        miss_distance_km = :miss_km,
+        miss_distance_miles = :miss_miles,
+        orbiting_body = :orbiting_body,
+        risk_score = :risk_score,
+        risk_model_version = :risk_model_version
+    WHERE DECODE(aa.miss_distance_km, :miss_km, 0, 1) = 1
+       OR DECODE(aa.velocity_kmph, :velocity_kmph, 0, 1) = 1
+       OR DECODE(aa.risk_score, :risk_score, 0, 1) = 1
+       OR DECODE(aa.risk_model_version, :risk_model_version, 0, 1) = 1
+       OR DECODE(aa.approach_date_full, :approach_date_full, 0, 1) = 1
+       OR DECODE(aa.orbiting_body, :orbiting_body, 0, 1) = 1
+    WHEN NOT MATCHED THEN
+    INSERT (
+        approach_id,
+        asteroid_id,
+        approach_date,
+        approach_date_full,
+        epoch_date_close_approach,
+        velocity_kmps,
+        velocity_kmph,
+        velocity_mph,
+        miss_distance_au,
+        miss_distance_lunar,
+        miss_distance_km,
+        miss_distance_miles,
+        orbiting_body,
+        risk_score,
+        risk_model_version
+    )
+    VALUES (
+        asteroid_approach_seq.NEXTVAL,
+        :asteroid_id,
+        TO_DATE(:approach_date, 'YYYY-MM-DD'),
+        :approach_date_full,
+        :epoch_date,
+        :velocity_kmps,
+        :velocity_kmph,
+        :velocity_mph,
+        :miss_au,
+        :miss_lunar,
+        :miss_km,
+        :miss_miles,
+        :orbiting_body,
+        :risk_score,
+        :risk_model_version
+    )
+"""
+
 
+def fetch_feed_file(start_date, end_date):
+    """
+    Download the NeoWs feed for an inclusive date window (YYYY-MM-DD strings)
+    into the on-disk response cache. Returns (file, payload_sha256); the
+    caller closes the file.
+    The API serves at most FEED_WINDOW_DAYS days per request.
+    """
     params = {
-        "start_date": today,
-        "end_date": today,
+        "start_date": start_date,
+        "end_date": end_date,
         "api_key": NASA_API_KEY
     }
 
-    response = requests.get(NASA_URL, params=params)
-    response.raise_for_status()
-    data = response.json()
+    return feed_cache.fetch_file(NASA_URL, params, (start_date, end_date))
+
+
+def fetch_feed(start_date, end_date):
+    body, _ = fetch_feed_file(start_date, end_date)
+    with body:
+        return json.load(body)
+
+
+def fetch_and_store_asteroids(start_date=None, end_date=None):
+    today = datetime.utcnow().strftime("%Y-%m-%d")
+    window = (start_date or today, end_date or start_date or today)
+
+    body, digest = fetch_feed_file(*window)
+    with body:
+        if feed_cache.already_ingested(window, digest):
+            print(f"⏭  Feed for {window[0]} → {window[1]} unchanged since last ingest, skipping DB write")
+            return skipped_result()
+        result = store_feed_stream(body)
+    feed_cache.mark_ingested(window, digest)
+    return result
+
+
+def skipped_result():
+    return {
+        "asteroids": 0,
+        "approaches": 0,
+        "errors": [],
+        "elapsed_sec": 0.0,
+        "rows_per_sec": 0.0,
+        "skipped": True
+    }
+
+
+# ================== FEED NORMALISATION ==================
+def asteroid_row(neo):
+    """Map one NeoWs object onto the bind variables of MERGE_ASTEROID_SQL."""
+    diameter = neo["estimated_diameter"]
+    return {
+        "asteroid_id": int(neo["id"]),
+        "neo_reference_id": neo["neo_reference_id"],
+        "name": neo["name"],
+        "nasa_jpl_url": neo["nasa_jpl_url"],
+        "absolute_magnitude_h": neo["absolute_magnitude_h"],
+        "is_potentially_hazardous": "YES" if neo["is_potentially_hazardous_asteroid"] else "NO",
+        "is_sentry_object": "YES" if neo["is_sentry_object"] else "NO",
+        "est_diam_km_min": diameter["kilometers"]["estimated_diameter_min"],
+        "est_diam_km_max": diameter["kilometers"]["estimated_diameter_max"],
+        "est_diam_m_min": diameter["meters"]["estimated_diameter_min"],
+        # Scored below; float() rejects a missing diameter as malformed
+        "est_diam_m_max": float(diameter["meters"]["estimated_diameter_max"]),
+        "est_diam_miles_min": diameter["miles"]["estimated_diameter_min"],
+        "est_diam_miles_max": diameter["miles"]["estimated_diameter_max"],
+        "est_diam_feet_min": diameter["feet"]["estimated_diameter_min"],
+        "est_diam_feet_max": diameter["feet"]["estimated_diameter_max"]
+    }
+
+
+def approach_rows(neo):
+    """
+    Map the close approaches of one NeoWs object onto MERGE_APPROACH_SQL binds.
+    risk_score is left empty; normalise_feed scores the whole feed in one batch.
+    An approach without an epoch raises KeyError/TypeError, so normalise_neos
+    reports the record as malformed.
+    """
+    rows = []
+    for approach in neo["close_approach_data"]:
+        rows.append({
+            "asteroid_id": int(neo["id"]),
+            "approach_date": approach["close_approach_date"],
+            "approach_date_full": approach.get("close_approach_date_full"),
+            # Part of the MERGE key: NULL would never match, so it is required
+            "epoch_date": int(approach["epoch_date_close_approach"]),
+            "velocity_kmps": float(approach["relative_velocity"]["kilometers_per_second"]),
+            "velocity_kmph": float(approach["relative_velocity"]["kilometers_per_hour"]),
+            "velocity_mph": float(approach["relative_velocity"]["miles_per_hour"]),
+            "miss_au": float(approach["miss_distance"]["astronomical"]),
+            "miss_lunar": float(approach["miss_distance"]["lunar"]),
+            "miss_km": float(approach["miss_distance"]["kilometers"]),
+            "miss_miles": float(approach["miss_distance"]["miles"]),
+            "orbiting_body": approach["orbiting_body"],
+            "risk_score": None,
+            "risk_model_version": None
+        })
+    return rows
+
+
+def normalise_neos(neos):
+    """
+    Flatten NeoWs objects into (asteroid_rows, approach_rows, errors).
+    Objects that are missing fields are reported in errors and skipped rather
+    than failing the whole feed.
+    """
+    asteroids = []
+    approaches = []
+    diameters = []
+    hazardous = []
+    errors = []
+
+    for neo in neos:
+        try:
+            neo_row = asteroid_row(neo)
+            neo_approaches = approach_rows(neo)
+        except (KeyError, TypeError, ValueError) as e:
+            errors.append(f"NEO {neo.get('id', '?')}: malformed record ({e!r})")
+            continue
+        asteroids.append(neo_row)
+        approaches.extend(neo_approaches)
+        diameters.extend([neo_row["est_diam_m_max"]] * len(neo_approaches))
+        hazardous.extend([neo_row["is_potentially_hazardous"]] * len(neo_approaches))
+
+    if approaches:
+        model = current_model()
+        scores = calculate_risk_batch(
+            [row["miss_km"] for row in approaches],
+            [row["velocity_kmph"] for row in approaches],
+            diameters,
+            hazardous,
+            model
+        )
+        for row, score in zip(approaches, scores.tolist()):
+            row["risk_score"] = score
+            row["risk_model_version"] = model["version"]
+
+    return asteroids, approaches, errors
+
+
+def feed_neos(data):
+    """Iterate the NeoWs objects of an already-parsed feed payload."""
+    for date in data["near_earth_objects"]:
+        for neo in data["near_earth_objects"][date]:
+            yield neo
+
+
+def normalise_feed(data):
+    """Flatten a whole parsed feed payload; see normalise_neos."""
+    return normalise_neos(feed_neos(data))
+
+
+def iter_feed_neos(fileobj):
+    """
+    Incrementally parse a NeoWs feed from a binary file object, yielding one
+    NEO dict at a time. Only the object currently being built is held in
+    memory, however large the payload is.
+    """
+    builder = None
+    item_prefix = None
+
+    for prefix, event, value in ijson.parse(fileobj, use_float=True):
+        if builder is None:
+            # Objects live at near_earth_objects.<date>.item
+            if (event == "start_map" and prefix.startswith("near_earth_objects.")
+                    and prefix.endswith(".item") and prefix.count(".") == 2):
+                builder = ijson.ObjectBuilder()
+                item_prefix = prefix
+                builder.event(event, value)
+            continue
+
+        builder.event(event, value)
+        if event == "end_map" and prefix == item_prefix:
+            yield builder.value
+            builder = None
 
-    conn = get_connection()
-    cur = conn.cursor()
 
+def _batched(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if size is not None and len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def ingest_neos(neos, write_batch, batch_size=None):
+    """
+    Normalise NEOs in batches of `batch_size` objects (all at once if None) and
+    hand each batch to write_batch(asteroids, approaches), which returns a list
+    of rejected-row errors. Returns (asteroid_count, approach_count, errors).
+    """
+    asteroid_count = 0
+    approach_count = 0
+    errors = []
+
+    for batch in _batched(neos, batch_size):
+        asteroids, approaches, batch_errors = normalise_neos(batch)
+        errors += batch_errors
+        errors += write_batch(asteroids, approaches)
+        asteroid_count += len(asteroids)
+        approach_count += len(approaches)
+
+    return asteroid_count, approach_count, errors
+
+
+# ================== ARRAY DML ==================
+# Approach ids of merged rows, looked up by natural key for the feed delta.
+# Chunked: Oracle allows at most 1000 expressions in an IN list.
+APPROACH_ID_CHUNK = 500
+APPROACH_IDS_SQL = """
+    SELECT approach_id, asteroid_id, epoch_date_close_approach
+    FROM asteroid_approach
+    WHERE (asteroid_id, epoch_date_close_approach) IN ({pairs})
+"""
+
+
+def _executemany(cur, sql, rows, input_sizes, label):
+    """
+    Run one array DML batch. Returns (errors, row_counts): error strings for
+    rejected rows and the number of rows each input row affected.
+    """
+    if not rows:
+        return [], []
+
+    cur.setinputsizes(**input_sizes)
+    cur.executemany(sql, rows, batcherrors=True, arraydmlrowcounts=True)
+
+    errors = []
+    for error in cur.getbatcherrors():
+        errors.append(f"{label} row {error.offset}: {error.message}")
+    return errors, cur.getarraydmlrowcounts()
+
+
+def _natural_key(row):
+    return (int(row["asteroid_id"]), int(row["epoch_date"]))
+
+
+def _approach_ids(cur, keys):
+    """{(asteroid_id, epoch_date): approach_id} for approaches just merged; MERGE can't return them."""
+    ids = {}
+    for start in range(0, len(keys), APPROACH_ID_CHUNK):
+        chunk = keys[start:start + APPROACH_ID_CHUNK]
+        binds = {}
+        for i, (asteroid_id, epoch_date) in enumerate(chunk):
+            binds[f"asteroid_id{i}"] = asteroid_id
+            binds[f"epoch_date{i}"] = epoch_date
+        pairs = ", ".join(f"(:asteroid_id{i}, :epoch_date{i})" for i in range(len(chunk)))
+        cur.execute(APPROACH_IDS_SQL.format(pairs=pairs), binds)
+        for approach_id, asteroid_id, epoch_date in cur:
+            ids[(int(asteroid_id), int(epoch_date))] = approach_id
+    return ids
+
+
+def store_rows(conn, asteroids, approaches, tally=None):
+    """
+    Write normalised rows with one executemany() per table.
+    Rejected rows are collected instead of aborting the batch. Does not commit.
+
+    If a tally dict is passed, the approach dates touched and the new or
+    changed approaches (all of them for the feed delta, and separately those
+    of watched asteroids) are added to it.
+    """
+    cur = conn.cursor()
     try:
-        for date in data["near_earth_objects"]:
-            for neo in data["near_earth_objects"][date]:
-
-                # ================== ASTEROIDS TABLE ==================
-                cur.execute("""
-                    MERGE INTO asteroids a
-                    USING dual
-                    ON (a.asteroid_id = :asteroid_id)
-                    WHEN NOT MATCHED THEN
-                    INSERT (
-                        asteroid_id,
-                        neo_reference_id,
-                        name,
-                        nasa_jpl_url,
-                        absolute_magnitude_h,
-                        is_potentially_hazardous,
-                        is_sentry_object,
-                        est_diam_km_min,
-                        est_diam_km_max,
-                        est_diam_m_min,
-                        est_diam_m_max,
-                        est_diam_miles_min,
-                        est_diam_miles_max,
-                        est_diam_feet_min,
-                        est_diam_feet_max
-                    )
-                    VALUES (
-                        :asteroid_id,
-                        :neo_reference_id,
-                        :name,
-                        :nasa_jpl_url,
-                        :absolute_magnitude_h,
-                        :is_potentially_hazardous,
-                        :is_sentry_object,
-                        :est_diam_km_min,
-                        :est_diam_km_max,
-                        :est_diam_m_min,
-                        :est_diam_m_max,
-                        :est_diam_miles_min,
-                        :est_diam_miles_max,
-                        :est_diam_feet_min,
-                        :est_diam_feet_max
-                    )
-                """, {
-                    "asteroid_id": int(neo["id"]),
-                    "neo_reference_id": neo["neo_reference_id"],
-                    "name": neo["name"],
-                    "nasa_jpl_url": neo["nasa_jpl_url"],
-                    "absolute_magnitude_h": neo["absolute_magnitude_h"],
-                    "is_potentially_hazardous": "YES" if neo["is_potentially_hazardous_asteroid"] else "NO",
-                    "is_sentry_object": "YES" if neo["is_sentry_object"] else "NO",
-                    "est_diam_km_min": neo["estimated_diameter"]["kilometers"]["estimated_diameter_min"],
-                    "est_diam_km_max": neo["estimated_diameter"]["kilometers"]["estimated_diameter_max"],
-                    "est_diam_m_min": neo["estimated_diameter"]["meters"]["estimated_diameter_min"],
-                    "est_diam_m_max": neo["estimated_diameter"]["meters"]["estimated_diameter_max"],
-                    "est_diam_miles_min": neo["estimated_diameter"]["miles"]["estimated_diameter_min"],
-                    "est_diam_miles_max": neo["estimated_diameter"]["miles"]["estimated_diameter_max"],
-                    "est_diam_feet_min": neo["estimated_diameter"]["feet"]["estimated_diameter_min"],
-                    "est_diam_feet_max": neo["estimated_diameter"]["feet"]["estimated_diameter_max"]
+        errors, _ = _executemany(cur, MERGE_ASTEROID_SQL, asteroids, ASTEROID_INPUT_SIZES, "asteroids")
+        approach_errors, changed = _executemany(cur, MERGE_APPROACH_SQL, approaches, APPROACH_INPUT_SIZES, "asteroid_approach")
+        errors += approach_errors
+
+        if tally is not None:
+            # The approach MERGE only touches rows whose values differ
+            changed_rows = [row for row, count in zip(approaches, changed) if count]
+            # One row past the limit is enough for publish() to fall back to a full refresh
+            room = feed_deltas.FEED_DELTA_MAX_ROWS + 1 - len(tally["upserts"])
+            delta_rows = changed_rows[:max(room, 0)]
+            approach_ids = _approach_ids(cur, [_natural_key(row) for row in delta_rows])
+    finally:
+        cur.close()
+
+    if tally is not None:
+        tally["dates"].update(row["approach_date"] for row in approaches)
+        by_id = {row["asteroid_id"]: row for row in asteroids}
+        for row in delta_rows:
+            asteroid = by_id.get(row["asteroid_id"], {})
+            tally["upserts"].append((
+                approach_ids.get(_natural_key(row)), row["asteroid_id"], asteroid.get("name"),
+                row["approach_date"], row["epoch_date"], asteroid.get("est_diam_km_max"),
+                row["velocity_kmph"], row["miss_km"], row["risk_score"],
+            ))
+        for row in changed_rows:
+            if watchers.is_watched(row["asteroid_id"]):
+                tally["watched_changes"].append({
+                    "asteroid_id": row["asteroid_id"],
+                    "approach_date": row["approach_date"],
+                    "miss_distance": row["miss_km"],
+                    "velocity": row["velocity_kmph"],
+                    "risk_score": row["risk_score"],
                 })
 
-                # ================== ASTEROID_APPROACH TABLE ==================
-                for approach in neo["close_approach_data"]:
-                    cur.execute("""
-                        INSERT INTO asteroid_approach (
-                            approach_id,
-                            asteroid_id,
-                            approach_date,
-                            approach_date_full,
-                            epoch_date_close_approach,
-                            velocity_kmps,
-                            velocity_kmph,
-                            velocity_mph,
-                            miss_distance_au,
-                            miss_distance_lunar,
-                            miss_distance_km,
-                            miss_distance_miles,
-                            orbiting_body,
-                            risk_score
-                        )
-                        VALUES (
-                            asteroid_approach_seq.NEXTVAL,
-                            :asteroid_id,
-                            TO_DATE(:approach_date, 'YYYY-MM-DD'),
-                            :approach_date_full,
-                            :epoch_date,
-                            :velocity_kmps,
-                            :velocity_kmph,
-                            :velocity_mph,
-                            :miss_au,
-                            :miss_lunar,
-                            :miss_km,
-                            :miss_miles,
-                            :orbiting_body,
-                            :risk_score
-                        )
-                    """, {
-                        "asteroid_id": int(neo["id"]),
-                        "approach_date": approach["close_approach_date"],
-                        "approach_date_full": approach.get("close_approach_date_full"),
-                        "epoch_date": approach.get("epoch_date_close_approach"),
-                        "velocity_kmps": float(approach["relative_velocity"]["kilometers_per_second"]),
-                        "velocity_kmph": float(approach["relative_velocity"]["kilometers_per_hour"]),
-                        "velocity_mph": float(approach["relative_velocity"]["miles_per_hour"]),
-                        "miss_au": float(approach["miss_distance"]["astronomical"]),
-                        "miss_lunar": float(approach["miss_distance"]["lunar"]),
-                        "miss_km": float(approach["miss_distance"]["kilometers"]),
-                        "miss_miles": float(approach["miss_distance"]["miles"]),
-                        "orbiting_body": approach["orbiting_body"],
-                        "risk_score": calculate_risk(
-                            float(approach["miss_distance"]["kilometers"]),
-                            float(approach["relative_velocity"]["kilometers_per_hour"]),
-                            neo["estimated_diameter"]["meters"]["estimated_diameter_max"],
-                            "YES" if neo["is_potentially_hazardous_asteroid"] else "NO"
-                        )
-                    })
+    return errors
 
-        conn.commit()
 
+def _store_neos(neos, batch_size):
+    """Bulk-write NEOs batch by batch inside a single transaction."""
+    started = time.perf_counter()
+
+    tally = {"dates": set(), "upserts": [], "watched_changes": []}
+    watchers.ensure_fresh()
+
+    conn = get_connection()
+    try:
+        asteroid_count, approach_count, errors = ingest_neos(
+            neos,
+            lambda asteroids, approaches: store_rows(conn, asteroids, approaches, tally),
+            batch_size
+        )
+        # Keep the dashboard summary in step with the rows, in the same transaction
+        stats_summary.refresh(conn, tally["dates"])
+        stats = stats_summary.read_summary(conn)
+        conn.commit()
     finally:
-        cur.close()
         conn.close()
+    response_cache.invalidate()
+    alerts.on_ingest()
+    watchers.notify(tally["watched_changes"])
+    if tally["upserts"]:
+        feed_deltas.publish(upserts=tally["upserts"], stats=stats)
+
+    elapsed = time.perf_counter() - started
+    total_rows = asteroid_count + approach_count
+    rows_per_sec = total_rows / elapsed if elapsed > 0 else 0.0
 
+    for error in errors:
+        print(f"⚠️  Skipped {error}")
+    print(f"✅ Stored {asteroid_count} asteroids and {approach_count} approaches "
+          f"in {elapsed:.2f}s ({rows_per_sec:.0f} rows/sec, {len(errors)} rejected)")
 
-# ================== RISK CALCULATION ==================
-def calculate_risk(miss_distance_km, velocity_kmph, diameter_m, is_hazardous):
-    # Weights
-    W_HAZARD = 0.30
-    W_DIST = 0.30
-    W_DIAM = 0.25
-    W_VEL = 0.15
+    return {
+        "asteroids": asteroid_count,
+        "approaches": approach_count,
+        "errors": errors,
+        "elapsed_sec": elapsed,
+        "rows_per_sec": rows_per_sec,
+        "skipped": False
+    }
 
-    # 1. Hazardous Status Score (0 or 1)
-    s_hazard = 1.0 if is_hazardous == "YES" else 0.0
 
-    # 2. Distance Score (Inverse log scale)
-    # 1 LD approx 384,400 km. Cap at 1.0 for < 1 LD. Decay to 0 at ~0.05 AU (7.5M km)
-    try:
-        import math
-        # Logarithmic decay: closer = higher score
-        # Using log10(miss_distance) to scale. 
-        # Target: < 400,000km -> 1.0, > 10,000,000km -> 0.0
-        if miss_distance_km < 400000:
-            s_dist = 1.0
-        elif miss_distance_km > 10000000:
-            s_dist = 0.0
-        else:
-            # Linear interpolation in log space
-            min_log = math.log10(400000)
-            max_log = math.log10(10000000)
-            curr_log = math.log10(miss_distance_km)
-            s_dist = 1.0 - ((curr_log - min_log) / (max_log - min_log))
-    except:
-        s_dist = 0.0
-
-    # 3. Diameter Score
-    # Potentially catastrophic > 140m (NASA definition PHA)
-    # Cap 1.0 at 1km (1000m)
-    if diameter_m > 1000:
-        s_diam = 1.0
-    else:
-        s_diam = diameter_m / 1000.0
-
-    # 4. Velocity Score
-    # Typical range 10k - 100k km/h? Actually avg is 20-25 km/s -> 70k-90k km/h
-    # Cap at 100,000 km/h
-    if velocity_kmph > 100000:
-        s_vel = 1.0
-    else:
-        s_vel = velocity_kmph / 100000.0
-
-    total_score = (s_hazard * W_HAZARD) + (s_dist * W_DIST) + (s_diam * W_DIAM) + (s_vel * W_VEL)
-    
-    # Scale to 0-10 for display friendliness, but DB expects 0-1? 
-    # Current code seemed to return 0-1. Let's stick to 0-1 but improved.
-    return round(min(1.0, max(0.0, total_score)), 4)
+def store_feed(data):
+    """Normalise an already-parsed feed payload and bulk-write it in one transaction."""
+    return _store_neos(feed_neos(data), None)
+
+
+def store_feed_stream(fileobj, batch_size=FEED_BATCH_SIZE):
+    """
+    Stream a feed payload from a binary file object into the DB, writing
+    `batch_size` NEOs per array DML batch. Peak memory is bounded by the batch
+    size rather than the payload size.
+    """
+    return _store_neos(iter_feed_neos(fileobj), batch_size)
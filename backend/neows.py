@@ -0,0 +1,176 @@
+"""
+HTTP client for NASA's NeoWs API.
+
+All feed downloads go through one pooled requests.Session with connect/read
+timeouts. 429 and 5xx responses are retried with exponential backoff and
+jitter. The hourly key quota reported in X-RateLimit-Remaining is tracked so
+that callers slow down before the key is burnt instead of after.
+"""
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+load_dotenv()
+
+NEOWS_CONNECT_TIMEOUT = float(os.getenv("NEOWS_CONNECT_TIMEOUT", "5"))
+NEOWS_READ_TIMEOUT = float(os.getenv("NEOWS_READ_TIMEOUT", "30"))
+NEOWS_MAX_RETRIES = int(os.getenv("NEOWS_MAX_RETRIES", "4"))
+NEOWS_BACKOFF_BASE = float(os.getenv("NEOWS_BACKOFF_BASE", "1.0"))
+NEOWS_BACKOFF_MAX = float(os.getenv("NEOWS_BACKOFF_MAX", "60"))
+# Once this few requests are left in the hour, calls are paced at the
+# quota's refill rate instead of going out as fast as possible
+NEOWS_QUOTA_RESERVE = int(os.getenv("NEOWS_QUOTA_RESERVE", "50"))
+NEOWS_POOL_SIZE = int(os.getenv("NEOWS_POOL_SIZE", "10"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_session = None
+_session_lock = threading.Lock()
+
+_pace_lock = threading.Lock()
+_last_call_at = 0.0
+
+_stats_lock = threading.Lock()
+_stats = {
+    "calls": 0,
+    "responses": 0,
+    "errors": 0,
+    "retries": 0,
+    "latency_ms_total": 0.0,
+    "latency_ms_max": 0.0,
+    "latency_ms_last": None,
+    "rate_limit": None,
+    "rate_limit_remaining": None,
+    "last_success_at": None,
+}
+
+
+def get_session():
+    """Return the shared keep-alive session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=NEOWS_POOL_SIZE, pool_maxsize=NEOWS_POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def _record_response(response, latency_ms):
+    limit = response.headers.get("X-RateLimit-Limit")
+    remaining = response.headers.get("X-RateLimit-Remaining")
+
+    with _stats_lock:
+        _stats["calls"] += 1
+        _stats["responses"] += 1
+        _stats["latency_ms_total"] += latency_ms
+        _stats["latency_ms_max"] = max(_stats["latency_ms_max"], latency_ms)
+        _stats["latency_ms_last"] = latency_ms
+        if limit is not None and limit.isdigit():
+            _stats["rate_limit"] = int(limit)
+        if remaining is not None and remaining.isdigit():
+            _stats["rate_limit_remaining"] = int(remaining)
+        if response.ok:
+            _stats["last_success_at"] = time.time()
+        else:
+            _stats["errors"] += 1
+
+
+def _wait_for_quota():
+    """
+    Pace calls at the quota's refill rate while the remaining budget is low.
+    Threads share the pacing, so concurrent backfill workers slow down together.
+    """
+    global _last_call_at
+
+    with _stats_lock:
+        limit = _stats["rate_limit"]
+        remaining = _stats["rate_limit_remaining"]
+
+    with _pace_lock:
+        if limit and remaining is not None and remaining <= NEOWS_QUOTA_RESERVE:
+            min_interval = 3600.0 / limit
+            wait = _last_call_at + min_interval - time.monotonic()
+            if wait > 0:
+                print(f"⏳ NeoWs quota low ({remaining}/{limit} left), waiting {wait:.1f}s")
+                time.sleep(wait)
+        _last_call_at = time.monotonic()
+
+
+def _backoff_delay(attempt, response=None):
+    """Exponential backoff with full jitter, honouring Retry-After when the server sends it."""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), NEOWS_BACKOFF_MAX)
+    return random.uniform(0, min(NEOWS_BACKOFF_MAX, NEOWS_BACKOFF_BASE * (2 ** attempt)))
+
+
+def get(url, params, headers=None, stream=False):
+    """
+    GET a NeoWs endpoint and return the response (which may be a 304 when
+    conditional headers are passed). With stream=True the body is left unread
+    for the caller to consume. Raises requests.HTTPError once retries are
+    exhausted.
+    """
+    session = get_session()
+
+    for attempt in range(NEOWS_MAX_RETRIES + 1):
+        _wait_for_quota()
+
+        started = time.perf_counter()
+        try:
+            response = session.get(url, params=params, headers=headers, stream=stream,
+                                   timeout=(NEOWS_CONNECT_TIMEOUT, NEOWS_READ_TIMEOUT))
+        except (requests.ConnectionError, requests.Timeout) as e:
+            with _stats_lock:
+                _stats["calls"] += 1
+                _stats["errors"] += 1
+            if attempt == NEOWS_MAX_RETRIES:
+                raise
+            delay = _backoff_delay(attempt)
+            print(f"⚠️  NeoWs request failed ({e}), retrying in {delay:.1f}s")
+        else:
+            _record_response(response, (time.perf_counter() - started) * 1000)
+            if response.status_code not in RETRY_STATUSES or attempt == NEOWS_MAX_RETRIES:
+                try:
+                    response.raise_for_status()
+                except requests.HTTPError:
+                    response.close()
+                    raise
+                return response
+            delay = _backoff_delay(attempt, response)
+            # Hand a streamed response's connection back to the pool before waiting
+            response.close()
+            print(f"⚠️  NeoWs returned {response.status_code}, retrying in {delay:.1f}s")
+
+        with _stats_lock:
+            _stats["retries"] += 1
+        time.sleep(delay)
+
+
+def get_json(url, params):
+    """GET a NeoWs endpoint and return the decoded JSON body."""
+    return get(url, params).json()
+
+
+def client_stats():
+    """Snapshot of call counts, latency and the last seen quota headers."""
+    with _stats_lock:
+        stats = dict(_stats)
+
+    responses = stats["responses"]
+    stats["latency_ms_avg"] = round(stats["latency_ms_total"] / responses, 3) if responses else 0.0
+    stats["latency_ms_total"] = round(stats["latency_ms_total"], 3)
+    stats["latency_ms_max"] = round(stats["latency_ms_max"], 3)
+    if stats["latency_ms_last"] is not None:
+        stats["latency_ms_last"] = round(stats["latency_ms_last"], 3)
+    return stats
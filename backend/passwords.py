@@ -0,0 +1,114 @@
+"""
+bcrypt hashing off the request thread.
+
+bcrypt is deliberately slow (~250 ms at cost 12), and under eventlet a hash
+computed inline stalls every socket on the worker. Hashes run on a small pool
+of native threads instead (eventlet's tpool when eventlet has patched
+threading, a ThreadPoolExecutor otherwise); bcrypt releases the GIL while it
+works. At most AUTH_HASH_WORKERS hashes run at once either way: tpool's own
+size (EVENTLET_THREADPOOL_SIZE) is shared with the DB calls and doesn't bound
+them. At most AUTH_HASH_MAX_PENDING hashes may be running or queued; past
+that, callers get HashingBusy and the route answers 503 rather than letting
+logins pile up.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+AUTH_HASH_WORKERS = int(os.getenv("AUTH_HASH_WORKERS", "4"))
+AUTH_HASH_MAX_PENDING = int(os.getenv("AUTH_HASH_MAX_PENDING", "32"))
+
+_executor = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(AUTH_HASH_MAX_PENDING)
+# Hashes handed to tpool; a green semaphore once eventlet has patched threading,
+# so waiting for one yields to the hub
+_running = threading.BoundedSemaphore(AUTH_HASH_WORKERS)
+_stats_lock = threading.Lock()
+_stats = {"hashes": 0, "checks": 0, "rejected": 0, "rehashed": 0}
+
+
+class HashingBusy(Exception):
+    """Raised when too many hashes are already running or queued."""
+
+
+def _eventlet_tpool():
+    try:
+        from eventlet import patcher, tpool
+    except ImportError:
+        return None
+    return tpool if patcher.is_monkey_patched("thread") else None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=AUTH_HASH_WORKERS,
+                                               thread_name_prefix="bcrypt")
+    return _executor
+
+
+def _offload(fn, *args):
+    if not _slots.acquire(blocking=False):
+        with _stats_lock:
+            _stats["rejected"] += 1
+        raise HashingBusy("Too many password hashes in progress")
+    try:
+        tpool = _eventlet_tpool()
+        if tpool is not None:
+            with _running:
+                return tpool.execute(fn, *args)
+        return _get_executor().submit(fn, *args).result()
+    finally:
+        _slots.release()
+
+
+def hash_password(password, rounds=None):
+    """bcrypt hash of `password` at BCRYPT_ROUNDS. Raises HashingBusy."""
+    salt = bcrypt.gensalt(rounds or BCRYPT_ROUNDS)
+    hashed = _offload(bcrypt.hashpw, password.encode("utf-8"), salt)
+    with _stats_lock:
+        _stats["hashes"] += 1
+    return hashed.decode("utf-8")
+
+
+def check_password(password, hashed):
+    """True if `password` matches `hashed`. Raises HashingBusy."""
+    matches = _offload(bcrypt.checkpw, password.encode("utf-8"), hashed.encode("utf-8"))
+    with _stats_lock:
+        _stats["checks"] += 1
+    return matches
+
+
+def hash_rounds(hashed):
+    """The cost factor stored in a bcrypt hash ($2b$<rounds>$...)."""
+    try:
+        return int(hashed.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def needs_rehash(hashed):
+    return hash_rounds(hashed) != BCRYPT_ROUNDS
+
+
+def record_rehash():
+    with _stats_lock:
+        _stats["rehashed"] += 1
+
+
+def hasher_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["rounds"] = BCRYPT_ROUNDS
+    stats["workers"] = AUTH_HASH_WORKERS
+    stats["max_pending"] = AUTH_HASH_MAX_PENDING
+    return stats
@@ -0,0 +1,175 @@
+"""
+Re-score stored approaches with the current risk model.
+
+Walks asteroid_approach in approach_id order (keyset pagination, so each chunk
+is an index range scan rather than an ever-growing OFFSET), scores each chunk
+with calculate_risk_batch and writes it back with one executemany(). Rows that
+already carry the current model version are skipped, so the job is cheap to
+re-run and resumes naturally after an interruption.
+
+    python rescore.py                  # re-score everything that is stale
+    python rescore.py --chunk-size 2000 --pause-ms 500
+"""
+import argparse
+import os
+import threading
+import time
+
+import alerts
+import feed_deltas
+import response_cache
+import watchers
+from db import get_connection, pool_stats
+from risk import calculate_risk_batch, current_model
+
+RESCORE_CHUNK_SIZE = int(os.getenv("RESCORE_CHUNK_SIZE", "5000"))
+# Pause between chunks so the job never monopolises the pool or the DB
+RESCORE_PAUSE_MS = int(os.getenv("RESCORE_PAUSE_MS", "200"))
+# Longest extra wait per chunk for a saturated pool, so steady API load slows
+# the job down without stalling it
+RESCORE_MAX_WAIT_MS = int(os.getenv("RESCORE_MAX_WAIT_MS", "5000"))
+
+COUNT_STALE_SQL = """
+    SELECT COUNT(*)
+    FROM asteroid_approach
+    WHERE risk_model_version IS NULL OR risk_model_version <> :version
+"""
+
+FETCH_CHUNK_SQL = """
+    SELECT aa.approach_id, aa.miss_distance_km, aa.velocity_kmph,
+           a.est_diam_m_max, a.is_potentially_hazardous,
+           aa.asteroid_id, aa.approach_date, aa.risk_score
+    FROM asteroid_approach aa
+    JOIN asteroids a ON a.asteroid_id = aa.asteroid_id
+    WHERE aa.approach_id > :last_id
+    AND (aa.risk_model_version IS NULL OR aa.risk_model_version <> :version)
+    ORDER BY aa.approach_id
+    FETCH FIRST :chunk_size ROWS ONLY
+"""
+
+UPDATE_SCORE_SQL = """
+    UPDATE asteroid_approach
+    SET risk_score = :risk_score, risk_model_version = :version
+    WHERE approach_id = :approach_id
+"""
+
+_progress_lock = threading.Lock()
+_progress = {
+    "running": False,
+    "model_version": None,
+    "total": 0,
+    "done": 0,
+    "rows_per_sec": 0.0,
+    "started_at": None,
+    "finished_at": None,
+}
+
+
+def rescore_progress():
+    """Snapshot of the current (or last) re-scoring run."""
+    with _progress_lock:
+        return dict(_progress)
+
+
+def _update_progress(**fields):
+    with _progress_lock:
+        _progress.update(fields)
+
+
+def _throttle(pause_ms):
+    """
+    Sleep between chunks, and up to RESCORE_MAX_WAIT_MS longer while API
+    requests hold every connection. The job holds none of its own here.
+    """
+    time.sleep(pause_ms / 1000.0)
+    deadline = time.monotonic() + RESCORE_MAX_WAIT_MS / 1000.0
+    stats = pool_stats()
+    while (stats["busy"] is not None and stats["busy"] >= stats["max"]
+           and time.monotonic() < deadline):
+        time.sleep(max(pause_ms, 100) / 1000.0)
+        stats = pool_stats()
+
+
+def rescore_approaches(chunk_size=RESCORE_CHUNK_SIZE, pause_ms=RESCORE_PAUSE_MS):
+    """Bring every stored risk_score up to the current model. Returns the number of rows updated."""
+    model = current_model()
+    version = model["version"]
+
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(COUNT_STALE_SQL, {"version": version})
+        total = cur.fetchone()[0]
+    finally:
+        cur.close()
+        conn.close()
+
+    if total == 0:
+        return 0
+
+    print(f"🧮 Re-scoring {total} approaches with risk model v{version}...")
+    started = time.perf_counter()
+    _update_progress(running=True, model_version=version, total=total, done=0,
+                     rows_per_sec=0.0, started_at=time.time(), finished_at=None)
+
+    watchers.ensure_fresh()
+    done = 0
+    last_id = 0
+    try:
+        while True:
+            # Borrow a connection per chunk so API requests get it back in between
+            conn = get_connection()
+            cur = conn.cursor()
+            try:
+                cur.execute(FETCH_CHUNK_SQL, {"last_id": last_id, "version": version,
+                                              "chunk_size": chunk_size})
+                rows = cur.fetchall()
+                if not rows:
+                    break
+
+                (approach_ids, miss_km, vel_kmph, diam_m, hazardous,
+                 asteroid_ids, approach_dates, old_scores) = zip(*rows)
+                scores = calculate_risk_batch(miss_km, vel_kmph, diam_m, hazardous, model).tolist()
+
+                cur.executemany(UPDATE_SCORE_SQL, [
+                    {"risk_score": score, "version": version, "approach_id": approach_id}
+                    for approach_id, score in zip(approach_ids, scores)
+                ])
+                conn.commit()
+            finally:
+                cur.close()
+                conn.close()
+
+            watchers.notify([
+                {"asteroid_id": asteroid_ids[i],
+                 "approach_date": approach_dates[i].strftime("%Y-%m-%d") if approach_dates[i] else None,
+                 "miss_distance": miss_km[i], "velocity": vel_kmph[i], "risk_score": scores[i]}
+                for i in range(len(rows))
+                if scores[i] != old_scores[i] and watchers.is_watched(asteroid_ids[i])
+            ])
+
+            last_id = approach_ids[-1]
+            done += len(rows)
+            elapsed = time.perf_counter() - started
+            rows_per_sec = done / elapsed if elapsed > 0 else 0.0
+            _update_progress(done=done, rows_per_sec=rows_per_sec)
+            print(f"   {done}/{total} rows ({100.0 * done / total:.1f}%, {rows_per_sec:.0f} rows/sec)")
+
+            _throttle(pause_ms)
+    finally:
+        _update_progress(running=False, finished_at=time.time())
+        if done:
+            response_cache.invalidate()
+            alerts.on_ingest()
+            feed_deltas.publish(full_refresh=True)
+
+    print(f"✅ Re-scored {done} approaches in {time.perf_counter() - started:.1f}s")
+    return done
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-score stored approaches with the current risk model.")
+    parser.add_argument("--chunk-size", type=int, default=RESCORE_CHUNK_SIZE)
+    parser.add_argument("--pause-ms", type=int, default=RESCORE_PAUSE_MS)
+    args = parser.parse_args()
+    rescore_approaches(args.chunk_size, args.pause_ms)
@@ -0,0 +1,143 @@
+"""
+Read-through cache for serialized API responses.
+
+Dashboard routes only change when ingestion commits, so their JSON bodies are
+cached in-process, keyed by route and query string, with a TTL and an LRU
+size limit. Ingestion calls invalidate() after it commits, which clears this
+worker's cache and tells the other workers to clear theirs (see fleet.py). On
+a miss only one request recomputes a key; concurrent requests for the same key
+wait for it instead of all hitting Oracle at once.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request, make_response
+
+import fleet
+
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "300"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+
+_lock = threading.Lock()
+_entries = OrderedDict()   # key -> (expires_at, body, content_type)
+_in_flight = {}            # key -> threading.Event set when the recompute finishes
+_generation = 0
+_stats = {"hits": 0, "misses": 0, "waits": 0, "invalidations": 0}
+
+
+def _lookup(key, now):
+    entry = _entries.get(key)
+    if entry is None:
+        return None
+    if entry[0] <= now:
+        del _entries[key]
+        return None
+    _entries.move_to_end(key)
+    return entry
+
+
+def get_or_compute(key, compute):
+    """
+    Return the cached (body, content_type) for key, or call compute() to produce it.
+    compute() returns (body, content_type, cacheable).
+    """
+    waited = False
+    while True:
+        with _lock:
+            entry = _lookup(key, time.monotonic())
+            if entry is not None:
+                # A request that waited on a recompute was already counted
+                if not waited:
+                    _stats["hits"] += 1
+                return entry[1], entry[2]
+
+            event = _in_flight.get(key)
+            if event is None:
+                # This request recomputes; everyone else waits for it
+                if not waited:
+                    _stats["misses"] += 1
+                event = _in_flight[key] = threading.Event()
+                generation = _generation
+                break
+            if not waited:
+                _stats["waits"] += 1
+            waited = True
+
+        event.wait()
+        # Loop: the result is normally cached now. If the recompute failed or
+        # was not cacheable, the next waiter takes over.
+
+    try:
+        body, content_type, cacheable = compute()
+        with _lock:
+            # Don't store a result computed from data an ingest has since replaced
+            if cacheable and generation == _generation:
+                _entries[key] = (time.monotonic() + RESPONSE_CACHE_TTL, body, content_type)
+                _entries.move_to_end(key)
+                while len(_entries) > RESPONSE_CACHE_MAX_ENTRIES:
+                    _entries.popitem(last=False)
+        return body, content_type
+    finally:
+        with _lock:
+            _in_flight.pop(key, None)
+        event.set()
+
+
+def _invalidate_local(_payload=None):
+    global _generation
+    with _lock:
+        _entries.clear()
+        _generation += 1
+        _stats["invalidations"] += 1
+
+
+def invalidate():
+    """Drop every cached response on every worker. Called after ingestion commits."""
+    _invalidate_local()
+    fleet.publish("cache_invalidate")
+
+
+fleet.on("cache_invalidate", _invalidate_local)
+
+
+def cache_stats():
+    """Hit/miss counters and the current hit ratio."""
+    with _lock:
+        stats = dict(_stats)
+        stats["entries"] = len(_entries)
+
+    lookups = stats["hits"] + stats["misses"] + stats["waits"]
+    stats["hit_ratio"] = round((stats["hits"] + stats["waits"]) / lookups, 4) if lookups else 0.0
+    return stats
+
+
+def cached_response(route_name):
+    """
+    Cache a Flask view's successful (200) responses, keyed by route name and
+    query string. Error and streamed responses pass through uncached.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            query = "&".join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True)))
+            key = f"{route_name}?{query}"
+            uncached = {}
+
+            def compute():
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    # Hand errors and streamed bodies back as-is, without caching them
+                    uncached["response"] = response
+                    return None, None, False
+                return response.get_data(), response.headers.get("Content-Type"), True
+
+            body, content_type = get_or_compute(key, compute)
+            if "response" in uncached:
+                return uncached["response"]
+            return make_response(body, 200, {"Content-Type": content_type})
+
+        return decorated
+    return decorator
@@ -0,0 +1,175 @@
+import math
+import os
+import numpy as np
+
+# ================== RISK MODELS ==================
+# Every stored risk_score records the model version that produced it. To change
+# the weights or caps, add a new version here rather than editing an old one,
+# then let the rescore job bring stored rows up to date.
+
+
+def _risk_model(version, w_hazard, w_dist, w_diam, w_vel,
+                dist_near_km, dist_far_km, diam_cap_m, vel_cap_kmph):
+    return {
+        "version": version,
+        "w_hazard": w_hazard,
+        "w_dist": w_dist,
+        "w_diam": w_diam,
+        "w_vel": w_vel,
+        "dist_near_km": dist_near_km,
+        "dist_far_km": dist_far_km,
+        "diam_cap_m": diam_cap_m,
+        "vel_cap_kmph": vel_cap_kmph,
+        # Distance score decays linearly in log space between the two bounds
+        "min_log": math.log10(dist_near_km),
+        "max_log": math.log10(dist_far_km),
+    }
+
+
+RISK_MODELS = {
+    1: _risk_model(
+        version=1,
+        w_hazard=0.30,
+        w_dist=0.30,
+        w_diam=0.25,
+        w_vel=0.15,
+        dist_near_km=400000,
+        dist_far_km=10000000,
+        diam_cap_m=1000,
+        vel_cap_kmph=100000,
+    ),
+}
+
+RISK_MODEL_VERSION = int(os.getenv("RISK_MODEL_VERSION", str(max(RISK_MODELS))))
+
+
+def current_model():
+    """The risk model new scores are written with."""
+    return RISK_MODELS[RISK_MODEL_VERSION]
+
+
+# ================== RISK CALCULATION ==================
+def calculate_risk(miss_distance_km, velocity_kmph, diameter_m, is_hazardous, model=None):
+    model = model or current_model()
+
+    # 1. Hazardous Status Score (0 or 1)
+    s_hazard = 1.0 if is_hazardous == "YES" else 0.0
+
+    # 2. Distance Score (Inverse log scale)
+    # 1 LD approx 384,400 km. Cap at 1.0 for < 1 LD. Decay to 0 at ~0.05 AU (7.5M km)
+    try:
+        # Logarithmic decay: closer = higher score
+        # Using log10(miss_distance) to scale.
+        # Target: < 400,000km -> 1.0, > 10,000,000km -> 0.0
+        if miss_distance_km < model["dist_near_km"]:
+            s_dist = 1.0
+        elif miss_distance_km > model["dist_far_km"]:
+            s_dist = 0.0
+        else:
+            # Linear interpolation in log space
+            curr_log = math.log10(miss_distance_km)
+            s_dist = 1.0 - ((curr_log - model["min_log"]) / (model["max_log"] - model["min_log"]))
+    except:
+        s_dist = 0.0
+
+    # 3. Diameter Score
+    # Potentially catastrophic > 140m (NASA definition PHA)
+    # Cap 1.0 at 1km (1000m)
+    if diameter_m > model["diam_cap_m"]:
+        s_diam = 1.0
+    else:
+        s_diam = diameter_m / float(model["diam_cap_m"])
+
+    # 4. Velocity Score
+    # Typical range 10k - 100k km/h? Actually avg is 20-25 km/s -> 70k-90k km/h
+    # Cap at 100,000 km/h
+    if velocity_kmph > model["vel_cap_kmph"]:
+        s_vel = 1.0
+    else:
+        s_vel = velocity_kmph / float(model["vel_cap_kmph"])
+
+    total_score = ((s_hazard * model["w_hazard"]) + (s_dist * model["w_dist"])
+                   + (s_diam * model["w_diam"]) + (s_vel * model["w_vel"]))
+
+    # Scale to 0-10 for display friendliness, but DB expects 0-1?
+    # Current code seemed to return 0-1. Let's stick to 0-1 but improved.
+    return round(min(1.0, max(0.0, total_score)), 4)
+
+
+def _missing(values):
+    """(array, mask of its None entries). Only object arrays can hold None."""
+    values = np.asarray(values)
+    if values.dtype != object:
+        return values, np.zeros(values.shape, dtype=bool)
+    return values, np.array([value is None for value in values], dtype=bool)
+
+
+def calculate_risk_batch(miss_km, vel_kmph, diam_m, hazardous, model=None):
+    """
+    Vectorised calculate_risk over equal-length arrays. Returns a float64 array
+    that matches the scalar function element for element.
+
+    `hazardous` may hold "YES"/"NO" strings or booleans. None is handled as
+    the scalar function handles it: a missing miss distance scores 0 for
+    distance, a missing velocity or diameter raises TypeError. test_risk.py
+    checks the parity.
+    """
+    model = model or current_model()
+
+    miss_km, miss_missing = _missing(miss_km)
+    vel_kmph, vel_missing = _missing(vel_kmph)
+    diam_m, diam_missing = _missing(diam_m)
+    if vel_missing.any() or diam_missing.any():
+        raise TypeError("velocity and diameter must not be None")
+
+    miss_km = np.where(miss_missing, np.nan, miss_km).astype(np.float64)
+    vel_kmph = vel_kmph.astype(np.float64)
+    diam_m = diam_m.astype(np.float64)
+    hazardous = np.asarray(hazardous)
+    if hazardous.dtype.kind in "USO":
+        hazardous = hazardous == "YES"
+    else:
+        hazardous = hazardous.astype(bool)
+
+    near, far = model["dist_near_km"], model["dist_far_km"]
+    min_log, max_log = model["min_log"], model["max_log"]
+    diam_cap, vel_cap = model["diam_cap_m"], model["vel_cap_kmph"]
+
+    s_hazard = np.where(hazardous, 1.0, 0.0)
+
+    # Clamp before log10 so out-of-band rows (masked below) never warn
+    with np.errstate(invalid="ignore", divide="ignore"):
+        curr_log = np.log10(np.clip(miss_km, near, far))
+    s_dist = np.where(
+        miss_km < near, 1.0,
+        np.where(miss_km > far, 0.0, 1.0 - ((curr_log - min_log) / (max_log - min_log)))
+    )
+    # The scalar version's comparison raises on None and falls back to 0
+    s_dist = np.where(miss_missing, 0.0, s_dist)
+
+    s_diam = np.where(diam_m > diam_cap, 1.0, diam_m / float(diam_cap))
+    s_vel = np.where(vel_kmph > vel_cap, 1.0, vel_kmph / float(vel_cap))
+
+    total = ((s_hazard * model["w_hazard"]) + (s_dist * model["w_dist"])
+             + (s_diam * model["w_diam"]) + (s_vel * model["w_vel"]))
+
+    # max(0.0, nan) is 0.0 in the scalar version, so NaN inputs score 0
+    total = np.where(np.isnan(total), 0.0, np.minimum(1.0, np.maximum(0.0, total)))
+
+    # rint(x * 1e4) / 1e4 agrees with Python's round(x, 4) everywhere except
+    # right at a rounding tie, where the product's own rounding error (or a
+    # 1-ulp difference between np.log10 and math.log10) can tip the result.
+    # Those rows are rare, so send them through the scalar function.
+    scaled = total * 1e4
+    scores = np.rint(scaled) / 1e4
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i in np.flatnonzero(near_tie):
+        scores[i] = calculate_risk(
+            None if miss_missing[i] else float(miss_km[i]),
+            float(vel_kmph[i]),
+            float(diam_m[i]),
+            "YES" if hazardous[i] else "NO",
+            model
+        )
+
+    return scores
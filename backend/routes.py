@@ -1,97 +1,252 @@
-from flask import Blueprint, jsonify
+import base64
+import json
+from datetime import datetime
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
 from db import get_connection
+from response_cache import cached_response
+from stats_summary import read_summary
+import feed_deltas
+import watchers
 
 api_bp = Blueprint("api", __name__)
 
+# ---------------- ASTEROID FEED ----------------
+
+ASTEROIDS_DEFAULT_LIMIT = 50
+ASTEROIDS_MAX_LIMIT = 10000
+# Pages larger than this are streamed straight from the cursor (and not cached)
+ASTEROIDS_STREAM_MIN_ROWS = 500
+STREAM_FETCH_ROWS = 500
+
+# Sortable fields -> SQL expression. Numeric sorts treat NULL as -1 so the
+# keyset comparison below stays total.
+SORT_COLUMNS = {
+    "approach_date": "aa.approach_date",
+    "risk_score": "NVL(aa.risk_score, -1)",
+    "diameter": "NVL(a.est_diam_km_max, -1)",
+    "velocity": "NVL(aa.velocity_kmph, -1)",
+    "miss_distance": "NVL(aa.miss_distance_km, -1)",
+}
+
+# Query parameter -> (column, operator)
+RANGE_FILTERS = {
+    "min_risk": ("aa.risk_score", ">="),
+    "max_risk": ("aa.risk_score", "<="),
+    "min_diameter": ("a.est_diam_km_max", ">="),
+    "max_diameter": ("a.est_diam_km_max", "<="),
+    "min_velocity": ("aa.velocity_kmph", ">="),
+    "max_velocity": ("aa.velocity_kmph", "<="),
+    "min_miss_distance": ("aa.miss_distance_km", ">="),
+    "max_miss_distance": ("aa.miss_distance_km", "<="),
+}
+
+
+def _encode_cursor(sort, value, approach_id):
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort, value, approach_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_cursor(token, sort):
+    try:
+        cursor_sort, value, approach_id = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort:
+        raise ValueError("Cursor was issued for a different sort")
+    try:
+        if sort == "approach_date":
+            value = datetime.fromisoformat(value)
+        elif isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise TypeError("sort value must be a number")
+        if isinstance(approach_id, bool) or not isinstance(approach_id, int):
+            raise TypeError("approach id must be an integer")
+    except (TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+    return value, approach_id
+
+
+def _build_asteroid_query(args):
+    """Translate query parameters into (sql, binds, limit, sort). Raises ValueError on bad input."""
+    sort = args.get("sort", "approach_date")
+    if sort not in SORT_COLUMNS:
+        raise ValueError(f"sort must be one of: {', '.join(SORT_COLUMNS)}")
+    order = args.get("order", "desc").lower()
+    if order not in ("asc", "desc"):
+        raise ValueError("order must be asc or desc")
+
+    limit = int(args.get("limit", ASTEROIDS_DEFAULT_LIMIT))
+    if not 1 <= limit <= ASTEROIDS_MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {ASTEROIDS_MAX_LIMIT}")
+
+    where = []
+    binds = {"row_limit": limit}
+
+    if args.get("from"):
+        where.append("aa.approach_date >= TO_DATE(:date_from, 'YYYY-MM-DD')")
+        binds["date_from"] = datetime.strptime(args["from"], "%Y-%m-%d").strftime("%Y-%m-%d")
+    else:
+        where.append("aa.approach_date >= SYSDATE - 7")
+    if args.get("to"):
+        where.append("aa.approach_date < TO_DATE(:date_to, 'YYYY-MM-DD') + 1")
+        binds["date_to"] = datetime.strptime(args["to"], "%Y-%m-%d").strftime("%Y-%m-%d")
+
+    for param, (column, op) in RANGE_FILTERS.items():
+        if args.get(param) is not None:
+            where.append(f"{column} {op} :{param}")
+            binds[param] = float(args[param])
+
+    hazardous = args.get("hazardous")
+    if hazardous is not None:
+        if hazardous.lower() not in ("true", "false"):
+            raise ValueError("hazardous must be true or false")
+        where.append("a.is_potentially_hazardous = :hazardous")
+        binds["hazardous"] = "YES" if hazardous.lower() == "true" else "NO"
+
+    sort_expr = SORT_COLUMNS[sort]
+    cmp = "<" if order == "desc" else ">"
+    if args.get("cursor"):
+        binds["cursor_value"], binds["cursor_id"] = _decode_cursor(args["cursor"], sort)
+        where.append(f"({sort_expr} {cmp} :cursor_value "
+                     f"OR ({sort_expr} = :cursor_value AND aa.approach_id {cmp} :cursor_id))")
+
+    sql = f"""
+        SELECT a.name, a.est_diam_km_max, aa.velocity_kmph, aa.miss_distance_km, aa.risk_score,
+               a.asteroid_id, a.neo_reference_id, aa.approach_id, aa.approach_date,
+               {sort_expr} AS sort_value
+        FROM asteroids a
+        JOIN asteroid_approach aa ON a.asteroid_id = aa.asteroid_id
+        WHERE {" AND ".join(where)}
+        ORDER BY {sort_expr} {order.upper()}, aa.approach_id {order.upper()}
+        FETCH FIRST :row_limit ROWS ONLY
+    """
+    return sql, binds, limit, sort
+
+
 @api_bp.route("/asteroids", methods=["GET"])
+@cached_response("asteroids")
 def get_asteroids():
+    """
+    Recent approaches, newest first by default.
+
+    Filters: from/to (YYYY-MM-DD, default last 7 days), min_/max_ risk,
+    diameter, velocity and miss_distance, hazardous=true|false.
+    Sorting: sort=approach_date|risk_score|diameter|velocity|miss_distance,
+    order=asc|desc. Paging: limit (default 50) and cursor, which takes the
+    "cursor" value of the last item of the previous page.
+    """
+    try:
+        sql, binds, limit, sort = _build_asteroid_query(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     try:
         conn = get_connection()
         cur = conn.cursor()
     except Exception as e:
         return jsonify({"error": f"Database connection failed: {str(e)}"}), 503
-    
+
     try:
-        # Fetch recent asteroids with approach data
-        cur.execute("""
-            SELECT a.name, a.est_diam_km_max, aa.velocity_kmph, aa.miss_distance_km, aa.risk_score, 
-                   a.asteroid_id, a.neo_reference_id
-            FROM asteroids a
-            JOIN asteroid_approach aa ON a.asteroid_id = aa.asteroid_id
-            WHERE aa.approach_date >= SYSDATE - 7
-            ORDER BY aa.approach_date DESC
-            FETCH FIRST 50 ROWS ONLY
-        """)
-        
-        asteroids = []
-        for row in cur:
-            asteroids.append({
-                "name": row[0],
-                "diameter": row[1],
-                "velocity": row[2],
-                "miss_distance": row[3],
-                "risk_score": row[4],
-                "id": row[5],
-                "neo_reference_id": row[6]
-            })
-            
-        return jsonify(asteroids)
+        cur.arraysize = STREAM_FETCH_ROWS
+        cur.execute(sql, binds)
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
-    finally:
         cur.close()
         conn.close()
+        return jsonify({"error": str(e)}), 500
+
+    dumps = current_app.json.dumps
+
+    def generate():
+        # Emit the JSON array element by element, fetchmany() at a time
+        try:
+            yield "["
+            first = True
+            while True:
+                rows = cur.fetchmany()
+                if not rows:
+                    break
+                for row in rows:
+                    item = {
+                        "name": row[0],
+                        "diameter": row[1],
+                        "velocity": row[2],
+                        "miss_distance": row[3],
+                        "risk_score": row[4],
+                        "id": row[5],
+                        "neo_reference_id": row[6],
+                        "approach_id": row[7],
+                        "approach_date": row[8],
+                        "cursor": _encode_cursor(sort, row[9], row[7])
+                    }
+                    yield ("" if first else ",") + dumps(item)
+                    first = False
+            yield "]"
+        finally:
+            cur.close()
+            conn.close()
+
+    if limit > ASTEROIDS_STREAM_MIN_ROWS:
+        return Response(stream_with_context(generate()), mimetype="application/json")
+
+    try:
+        return Response("".join(generate()), mimetype="application/json")
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
 @api_bp.route("/stats", methods=["GET"])
+@cached_response("stats")
 def get_stats():
     try:
         conn = get_connection()
-        cur = conn.cursor()
     except Exception as e:
         return jsonify({"error": f"Database connection failed: {str(e)}"}), 503
     
     try:
-        # Get total count
-        cur.execute("SELECT COUNT(*) FROM asteroids")
-        total_count = cur.fetchone()[0]
-        
-        # Get hazardous count
-        cur.execute("SELECT COUNT(*) FROM asteroids WHERE is_potentially_hazardous = 'YES'")
-        hazardous_count = cur.fetchone()[0]
-        
-        # Get closest approach today/future
-        cur.execute("""
-            SELECT MIN(miss_distance_km) 
-            FROM asteroid_approach 
-            WHERE approach_date >= TRUNC(SYSDATE)
-        """)
-        closest_distance = cur.fetchone()[0]
-        
-        # Get fastest asteroid
-        cur.execute("""
-            SELECT MAX(velocity_kmph) 
-            FROM asteroid_approach 
-            WHERE approach_date >= TRUNC(SYSDATE - 30)
-        """)
-        fastest_velocity = cur.fetchone()[0]
-
-        return jsonify({
-            "total_neos": total_count,
-            "hazardous_count": hazardous_count,
-            "closest_distance": closest_distance,
-            "fastest_velocity": fastest_velocity
-        })
+        # Single primary-key read of the summary maintained at ingest time
+        return jsonify(read_summary(conn))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     finally:
-        cur.close()
         conn.close()
 
+@api_bp.route("/feed/changes", methods=["GET"])
+def get_feed_changes():
+    """
+    feed_update deltas newer than ?since=<version>. Pass the epoch from the
+    last delta too; 410 means the client is too far behind (or this worker
+    started since) and should reload /api/asteroids and /api/stats.
+    """
+    try:
+        since = int(request.args.get("since", 0))
+    except ValueError:
+        return jsonify({"error": "since must be an integer"}), 400
+
+    deltas = feed_deltas.changes_since(since, request.args.get("epoch"))
+    if deltas is None:
+        return jsonify({"error": "Changes no longer available, reload the feed",
+                        **feed_deltas.current_version()}), 410
+    return jsonify({**feed_deltas.current_version(), "deltas": deltas})
+
 # ---------------- WATCHLIST ----------------
 
 from middleware import token_required
 from flask import request
 
+WATCHLIST_SQL = """
+    SELECT a.name, a.asteroid_id, a.neo_reference_id, 
+           aa.miss_distance_km, aa.velocity_kmph, aa.risk_score
+    FROM watchlist w
+    JOIN asteroids a ON w.asteroid_id = a.asteroid_id
+    LEFT JOIN (
+        SELECT asteroid_id, miss_distance_km, velocity_kmph, risk_score,
+               ROW_NUMBER() OVER (PARTITION BY asteroid_id ORDER BY approach_date ASC) as rn
+        FROM asteroid_approach
+        WHERE approach_date >= SYSDATE
+    ) aa ON a.asteroid_id = aa.asteroid_id AND aa.rn = 1
+    WHERE w.user_id = :user_id
+"""
+
 @api_bp.route("/watchlist", methods=["POST"])
 @token_required
 def add_to_watchlist(user_id):
@@ -113,6 +268,7 @@ def add_to_watchlist(user_id):
             VALUES (:user_id, :asteroid_id)
         """, {"user_id": user_id, "asteroid_id": int(asteroid_id)})
         conn.commit()
+        watchers.subscribe(user_id, int(asteroid_id))
         return jsonify({"message": "Added to watchlist"}), 201
     except Exception as e:
         # Check for duplicate
@@ -133,19 +289,7 @@ def get_watchlist(user_id):
         return jsonify({"error": f"Database connection failed: {str(e)}"}), 503
     
     try:
-        cur.execute("""
-            SELECT a.name, a.asteroid_id, a.neo_reference_id, 
-                   aa.miss_distance_km, aa.velocity_kmph, aa.risk_score
-            FROM watchlist w
-            JOIN asteroids a ON w.asteroid_id = a.asteroid_id
-            LEFT JOIN (
-                SELECT asteroid_id, miss_distance_km, velocity_kmph, risk_score,
-                       ROW_NUMBER() OVER (PARTITION BY asteroid_id ORDER BY approach_date ASC) as rn
-                FROM asteroid_approach
-                WHERE approach_date >= SYSDATE
-            ) aa ON a.asteroid_id = aa.asteroid_id AND aa.rn = 1
-            WHERE w.user_id = :user_id
-        """, {"user_id": user_id})
+        cur.execute(WATCHLIST_SQL, {"user_id": user_id})
         
         watchlist = []
         for row in cur:
@@ -179,6 +323,7 @@ def remove_from_watchlist(user_id, asteroid_id):
             WHERE user_id = :user_id AND asteroid_id = :asteroid_id
         """, {"user_id": user_id, "asteroid_id": asteroid_id})
         conn.commit()
+        watchers.unsubscribe(user_id, asteroid_id)
         return jsonify({"message": "Removed from watchlist"}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -188,6 +333,15 @@ def remove_from_watchlist(user_id, asteroid_id):
 
 # ---------------- PROBED ANALYSIS ----------------
 
+RISK_ANALYSIS_SQL = """
+    SELECT a.name, a.est_diam_m_max, a.is_potentially_hazardous,
+           aa.approach_date, aa.miss_distance_km, aa.velocity_kmph, aa.risk_score
+    FROM asteroids a
+    JOIN asteroid_approach aa ON a.asteroid_id = aa.asteroid_id
+    WHERE a.asteroid_id = :asteroid_id
+    ORDER BY aa.approach_date ASC
+"""
+
 @api_bp.route("/risk-analysis/<int:asteroid_id>", methods=["GET"])
 def get_risk_analysis(asteroid_id):
     try:
@@ -198,14 +352,7 @@ def get_risk_analysis(asteroid_id):
     
     try:
         # Get details + history of approaches to see if it's getting closer
-        cur.execute("""
-            SELECT a.name, a.est_diam_m_max, a.is_potentially_hazardous,
-                   aa.approach_date, aa.miss_distance_km, aa.velocity_kmph, aa.risk_score
-            FROM asteroids a
-            JOIN asteroid_approach aa ON a.asteroid_id = aa.asteroid_id
-            WHERE a.asteroid_id = :asteroid_id
-            ORDER BY aa.approach_date ASC
-        """, {"asteroid_id": asteroid_id})
+        cur.execute(RISK_ANALYSIS_SQL, {"asteroid_id": asteroid_id})
         
         rows = cur.fetchall()
         if not rows:
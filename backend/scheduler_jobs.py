@@ -1,56 +1,60 @@
-from extensions import socketio, scheduler
 from nasa import fetch_and_store_asteroids
-from db import get_connection
+from rescore import rescore_approaches
+from archive import archive_expired
+from alerts import refresh as refresh_alerts
 import oracledb
 
+# Each job logs its failure and re-raises it, so job_locks.leader_job records
+# the run as failed
+
 def update_asteroid_data():
     """Job to fetch fresh data from NASA."""
     print("⏳ Scheduled Task: Fetching Asteroids...")
     try:
+        # Ingestion publishes the feed_update delta itself, and only if rows changed
         fetch_and_store_asteroids()
         print("✅ Scheduled Task: Asteroids Updated.")
-        socketio.emit('feed_update', {'message': 'New data available'})
     except oracledb.Error as e:
         print(f"❌ Scheduled Task Failed (Database Error): {e}")
+        raise
     except Exception as e:
         print(f"❌ Scheduled Task Failed: {e}")
+        raise
+
+def rescore_risk_scores():
+    """Job to bring stored risk scores up to the current risk model."""
+    try:
+        updated = rescore_approaches()
+        if updated:
+            print(f"✅ Scheduled Task: Re-scored {updated} approaches.")
+    except oracledb.Error as e:
+        print(f"❌ Re-scoring Failed (Database Error): {e}")
+        raise
+    except Exception as e:
+        print(f"❌ Re-scoring Failed: {e}")
+        raise
+
+def archive_old_approaches():
+    """Job to archive and drop approach partitions past the retention window."""
+    try:
+        archived = archive_expired()
+        if archived:
+            print(f"✅ Scheduled Task: Archived {len(archived)} months of approaches.")
+    except oracledb.Error as e:
+        print(f"❌ Archival Failed (Database Error): {e}")
+        raise
+    except Exception as e:
+        print(f"❌ Archival Failed: {e}")
+        raise
 
 def check_alerts():
-    """Job to check for high-risk asteroids approaching soon."""
+    """Job to load upcoming high-risk approaches and arm the alert window timer."""
     print("⏳ Checking for alerts...")
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-        try:
-            # Check for hazardous asteroids approaching in next 24h
-            cur.execute("""
-                SELECT a.name, aa.miss_distance_km, aa.velocity_kmph, aa.risk_score
-                FROM asteroids a
-                JOIN asteroid_approach aa ON a.asteroid_id = aa.asteroid_id
-                WHERE aa.approach_date >= SYSDATE 
-                AND aa.approach_date < SYSDATE + 1
-                AND aa.risk_score > 0.5
-            """)
-            
-            alerts = []
-            for row in cur:
-                alert = {
-                    "asteroid": row[0],
-                    "miss_distance": row[1],
-                    "velocity": row[2],
-                    "risk_score": row[3],
-                    "message": f"High risk asteroid {row[0]} approaching!"
-                }
-                alerts.append(alert)
-            
-            if alerts:
-                print(f"🚨 Sending {len(alerts)} alerts!")
-                socketio.emit('alert', {'alerts': alerts})
-            
-        finally:
-            cur.close()
-            conn.close()
+        refresh_alerts()
     except oracledb.Error as e:
         print(f"❌ Alert Check Failed (Database Error): {e}")
+        raise
     except Exception as e:
         print(f"❌ Alert Check Failed: {e}")
+        raise
@@ -0,0 +1,403 @@
+"""
+Versioned schema for every table, sequence and index the backend uses.
+
+Each migration is a numbered list of DDL statements. migrate() applies the
+ones not yet recorded in schema_version, in order. The statements are safe to
+re-run ("already exists" errors are ignored), so a database created by the old
+init_db.py scripts simply gets its versions recorded on the first run.
+
+check_plans() runs EXPLAIN PLAN over the hot queries of routes.py,
+alerts.py, chat_history.py and the ingest/rescore jobs, and reports
+any that fall back to a full scan of a large table.
+
+    python schema.py                 # apply pending migrations
+    python schema.py --check-plans   # exit 1 if a hot query does a full table scan
+"""
+import argparse
+
+import oracledb
+from db import get_connection
+
+# ORA errors that only mean "this DDL was already applied"
+ALREADY_APPLIED = {
+    955,    # name is already used by an existing object
+    1408,   # such column list already indexed
+    1430,   # column being added already exists in table
+    2260,   # table can have only one primary key
+    2261,   # such unique or primary key already exists
+    2275,   # such a referential constraint already exists
+}
+ORA_DUPLICATE_KEYS = 1452
+
+# Tables large enough that a full scan on a request path is a regression
+LARGE_TABLES = ("ASTEROID_APPROACH", "ASTEROIDS", "MESSAGES", "WATCHLIST", "USERS")
+
+CREATE_VERSION_TABLE_SQL = """
+    CREATE TABLE schema_version (
+        version NUMBER NOT NULL,
+        description VARCHAR2(200),
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        CONSTRAINT pk_schema_version PRIMARY KEY (version)
+    )
+"""
+
+MIGRATIONS = [
+    (1, "base tables and sequences", [
+        """
+        CREATE TABLE users (
+            user_id NUMBER NOT NULL,
+            full_name VARCHAR2(100),
+            email VARCHAR2(255) NOT NULL,
+            password_hash VARCHAR2(255) NOT NULL,
+            role VARCHAR2(20) DEFAULT 'user',
+            is_verified VARCHAR2(3) DEFAULT 'NO',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT pk_users PRIMARY KEY (user_id),
+            CONSTRAINT uq_users_email UNIQUE (email)
+        )
+        """,
+        "CREATE SEQUENCE users_seq START WITH 1 INCREMENT BY 1 NOCACHE",
+        """
+        CREATE TABLE asteroids (
+            asteroid_id NUMBER NOT NULL,
+            neo_reference_id VARCHAR2(20),
+            name VARCHAR2(100),
+            nasa_jpl_url VARCHAR2(500),
+            absolute_magnitude_h NUMBER,
+            is_potentially_hazardous VARCHAR2(3),
+            is_sentry_object VARCHAR2(3),
+            est_diam_km_min NUMBER,
+            est_diam_km_max NUMBER,
+            est_diam_m_min NUMBER,
+            est_diam_m_max NUMBER,
+            est_diam_miles_min NUMBER,
+            est_diam_miles_max NUMBER,
+            est_diam_feet_min NUMBER,
+            est_diam_feet_max NUMBER,
+            CONSTRAINT pk_asteroids PRIMARY KEY (asteroid_id)
+        )
+        """,
+        """
+        CREATE TABLE asteroid_approach (
+            approach_id NUMBER NOT NULL,
+            asteroid_id NUMBER NOT NULL,
+            approach_date DATE,
+            approach_date_full VARCHAR2(50),
+            epoch_date_close_approach NUMBER,
+            velocity_kmps NUMBER,
+            velocity_kmph NUMBER,
+            velocity_mph NUMBER,
+            miss_distance_au NUMBER,
+            miss_distance_lunar NUMBER,
+            miss_distance_km NUMBER,
+            miss_distance_miles NUMBER,
+            orbiting_body VARCHAR2(50),
+            risk_score NUMBER,
+            CONSTRAINT pk_asteroid_approach PRIMARY KEY (approach_id),
+            CONSTRAINT fk_approach_asteroid FOREIGN KEY (asteroid_id) REFERENCES asteroids(asteroid_id)
+        )
+        """,
+        "CREATE SEQUENCE asteroid_approach_seq START WITH 1 INCREMENT BY 1 CACHE 100",
+    ]),
+    (2, "watchlist and chat messages", [
+        """
+        CREATE TABLE watchlist (
+            user_id NUMBER NOT NULL,
+            asteroid_id NUMBER NOT NULL,
+            added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT pk_watchlist PRIMARY KEY (user_id, asteroid_id),
+            CONSTRAINT fk_user FOREIGN KEY (user_id) REFERENCES users(user_id),
+            CONSTRAINT fk_asteroid FOREIGN KEY (asteroid_id) REFERENCES asteroids(asteroid_id)
+        )
+        """,
+        """
+        CREATE TABLE messages (
+            message_id NUMBER GENERATED BY DEFAULT ON NULL AS IDENTITY,
+            user_id NUMBER,
+            sender_name VARCHAR2(100),
+            message_text VARCHAR2(4000),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT pk_messages PRIMARY KEY (message_id)
+        )
+        """,
+    ]),
+    (3, "risk model version on approaches", [
+        "ALTER TABLE asteroid_approach ADD (risk_model_version NUMBER)",
+    ]),
+    (4, "natural key on approaches", [
+        """
+        CREATE UNIQUE INDEX ux_approach_natural_key
+        ON asteroid_approach (asteroid_id, epoch_date_close_approach)
+        """,
+    ]),
+    (5, "dashboard stats tables", [
+        """
+        CREATE TABLE neo_stats_daily (
+            stat_date DATE NOT NULL,
+            approach_count NUMBER,
+            min_miss_km NUMBER,
+            max_velocity_kmph NUMBER,
+            refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT pk_neo_stats_daily PRIMARY KEY (stat_date)
+        )
+        """,
+        """
+        CREATE TABLE neo_stats_summary (
+            as_of_date DATE NOT NULL,
+            total_neos NUMBER,
+            hazardous_count NUMBER,
+            closest_distance NUMBER,
+            fastest_velocity NUMBER,
+            refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT pk_neo_stats_summary PRIMARY KEY (as_of_date)
+        )
+        """,
+    ]),
+    (6, "covering indexes for the hot queries", [
+        # /api/asteroids date window, alerting and the stats refresh: every
+        # approach column they read is in the index, only asteroids is joined
+        """
+        CREATE INDEX ix_approach_date_cover
+        ON asteroid_approach (approach_date, asteroid_id, risk_score,
+                              velocity_kmph, miss_distance_km, approach_id)
+        """,
+        # Watchlist next-approach lookup and /api/risk-analysis history
+        """
+        CREATE INDEX ix_approach_asteroid_date
+        ON asteroid_approach (asteroid_id, approach_date, miss_distance_km,
+                              velocity_kmph, risk_score)
+        """,
+        # min_risk filters across wide date ranges
+        "CREATE INDEX ix_approach_risk ON asteroid_approach (risk_score, approach_date)",
+        # Chat history ordered by time
+        "CREATE INDEX ix_messages_created ON messages (created_at, sender_name)",
+        # Login by email, for databases created before uq_users_email existed
+        "CREATE UNIQUE INDEX ix_users_email ON users (email)",
+    ]),
+    (7, "monthly interval partitions on approaches", [
+        # Converted online (Oracle 12.2+). The date-leading indexes become
+        # local so dropping an old month only touches its own segments; the
+        # primary key and natural key stay global.
+        """
+        DECLARE
+            n NUMBER;
+        BEGIN
+            SELECT COUNT(*) INTO n FROM user_part_tables WHERE table_name = 'ASTEROID_APPROACH';
+            IF n = 0 THEN
+                EXECUTE IMMEDIATE '
+                    ALTER TABLE asteroid_approach MODIFY
+                    PARTITION BY RANGE (approach_date) INTERVAL (NUMTOYMINTERVAL(1, ''MONTH''))
+                    (PARTITION p_before_2000 VALUES LESS THAN (DATE ''2000-01-01''))
+                    ONLINE
+                    UPDATE INDEXES (ix_approach_date_cover LOCAL, ix_approach_risk LOCAL)
+                ';
+            END IF;
+        END;
+        """,
+        # Archived months re-attached for historical analysis (see archive.py)
+        """
+        CREATE TABLE asteroid_approach_history (
+            approach_id NUMBER NOT NULL,
+            asteroid_id NUMBER NOT NULL,
+            approach_date DATE NOT NULL,
+            approach_date_full VARCHAR2(50),
+            epoch_date_close_approach NUMBER,
+            velocity_kmps NUMBER,
+            velocity_kmph NUMBER,
+            velocity_mph NUMBER,
+            miss_distance_au NUMBER,
+            miss_distance_lunar NUMBER,
+            miss_distance_km NUMBER,
+            miss_distance_miles NUMBER,
+            orbiting_body VARCHAR2(50),
+            risk_score NUMBER,
+            risk_model_version NUMBER
+        )
+        PARTITION BY RANGE (approach_date) INTERVAL (NUMTOYMINTERVAL(1, 'MONTH'))
+        (PARTITION p_before_2000 VALUES LESS THAN (DATE '2000-01-01'))
+        """,
+        "CREATE INDEX ix_history_asteroid_date ON asteroid_approach_history (asteroid_id, approach_date) LOCAL",
+    ]),
+    (8, "scheduler leases and job run history", [
+        # One row per lease; the scheduler leader holds the 'scheduler' row (see job_locks.py)
+        """
+        CREATE TABLE job_leases (
+            job_name VARCHAR2(100) NOT NULL,
+            holder VARCHAR2(200) NOT NULL,
+            acquired_at TIMESTAMP NOT NULL,
+            lease_until TIMESTAMP NOT NULL,
+            CONSTRAINT pk_job_leases PRIMARY KEY (job_name)
+        )
+        """,
+        """
+        CREATE TABLE job_runs (
+            run_id NUMBER GENERATED ALWAYS AS IDENTITY,
+            job_name VARCHAR2(100) NOT NULL,
+            holder VARCHAR2(200) NOT NULL,
+            started_at TIMESTAMP NOT NULL,
+            finished_at TIMESTAMP,
+            duration_ms NUMBER,
+            outcome VARCHAR2(20) NOT NULL,
+            error VARCHAR2(4000),
+            CONSTRAINT pk_job_runs PRIMARY KEY (run_id)
+        )
+        """,
+        # "Has this job run within its interval?" on every due check
+        "CREATE INDEX ix_job_runs_name_started ON job_runs (job_name, started_at)",
+    ]),
+    (9, "seed the dashboard stats tables", [
+        # v5 created the tables empty, and ingests since then only aggregate
+        # the days they touch: fill in every other day already stored
+        """
+        INSERT INTO neo_stats_daily (stat_date, approach_count, min_miss_km, max_velocity_kmph, refreshed_at)
+        SELECT TRUNC(approach_date), COUNT(*), MIN(miss_distance_km), MAX(velocity_kmph), CURRENT_TIMESTAMP
+        FROM asteroid_approach
+        GROUP BY TRUNC(approach_date)
+        HAVING TRUNC(approach_date) NOT IN (SELECT stat_date FROM neo_stats_daily)
+        """,
+        # Rebuilt from the seeded days on the next read_summary()
+        "DELETE FROM neo_stats_summary WHERE as_of_date = TRUNC(SYSDATE)",
+    ]),
+    (10, "fleet-wide feed delta version", [
+        """
+        CREATE TABLE feed_state (
+            feed_name VARCHAR2(30) NOT NULL,
+            epoch VARCHAR2(32) NOT NULL,
+            version NUMBER NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT pk_feed_state PRIMARY KEY (feed_name)
+        )
+        """,
+        """
+        INSERT INTO feed_state (feed_name, epoch, version)
+        SELECT 'feed', LOWER(SUBSTR(RAWTOHEX(SYS_GUID()), 1, 12)), 0 FROM dual
+        WHERE NOT EXISTS (SELECT 1 FROM feed_state WHERE feed_name = 'feed')
+        """,
+    ]),
+]
+
+
+def _run_ddl(cur, ddl):
+    """Execute one DDL statement, ignoring errors that mean it is already in place."""
+    try:
+        cur.execute(ddl)
+    except oracledb.DatabaseError as e:
+        error, = e.args
+        if error.code in ALREADY_APPLIED:
+            return
+        if error.code == ORA_DUPLICATE_KEYS:
+            raise RuntimeError(
+                "asteroid_approach has duplicate approaches; run compact_approaches.py first"
+            ) from e
+        raise
+
+
+def applied_versions(cur):
+    cur.execute("SELECT version FROM schema_version")
+    return {row[0] for row in cur}
+
+
+def migrate():
+    """Apply pending migrations in order. Returns the versions applied."""
+    conn = get_connection()
+    cur = conn.cursor()
+    applied = []
+
+    try:
+        _run_ddl(cur, CREATE_VERSION_TABLE_SQL)
+        done = applied_versions(cur)
+
+        for version, description, statements in MIGRATIONS:
+            if version in done:
+                continue
+            print(f"🛠 Applying schema v{version}: {description}...")
+            for ddl in statements:
+                _run_ddl(cur, ddl)
+            cur.execute(
+                "INSERT INTO schema_version (version, description) VALUES (:version, :description)",
+                {"version": version, "description": description}
+            )
+            conn.commit()
+            applied.append(version)
+
+        print(f"✅ Schema at v{MIGRATIONS[-1][0]} ({len(applied)} migrations applied).")
+        return applied
+    finally:
+        cur.close()
+        conn.close()
+
+
+def hot_queries():
+    """(name, sql, binds) for every query on a request or job path."""
+    # Imported here so migrating doesn't need the Flask app importable
+    import alerts
+    import chat_history
+    import rescore
+    import routes
+    import stats_summary
+
+    queries = []
+    for sort in ("approach_date", "risk_score"):
+        sql, binds, _, _ = routes._build_asteroid_query({"sort": sort})
+        queries.append((f"asteroids_by_{sort}", sql, binds))
+
+    queries += [
+        ("watchlist", routes.WATCHLIST_SQL, {"user_id": 1}),
+        ("risk_analysis", routes.RISK_ANALYSIS_SQL, {"asteroid_id": 1}),
+        ("alert_candidates", alerts.CANDIDATES_SQL, {"horizon_days": 8, "threshold": 0.5}),
+        ("chat_history", chat_history.RECENT_MESSAGES_SQL, {"row_limit": 50}),
+        ("chat_history_older", chat_history.OLDER_MESSAGES_SQL, {"before_id": 1, "row_limit": 50}),
+        ("stats_refresh_daily", stats_summary.REFRESH_DAILY_SQL, {"stat_date": "2026-01-01"}),
+        ("rescore_chunk", rescore.FETCH_CHUNK_SQL, {"last_id": 0, "version": 1, "chunk_size": 1}),
+    ]
+    return queries
+
+
+def check_plans():
+    """
+    EXPLAIN every hot query and return {name: [table, ...]} for those that do
+    a full scan of a large table. An empty dict means every plan is indexed.
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    regressions = {}
+
+    try:
+        for name, sql, binds in hot_queries():
+            statement_id = f"schema_check_{name}"[:30]
+            cur.execute("DELETE FROM plan_table WHERE statement_id = :id", {"id": statement_id})
+            cur.execute(f"EXPLAIN PLAN SET STATEMENT_ID = '{statement_id}' FOR {sql}", binds)
+            cur.execute("""
+                SELECT DISTINCT object_name
+                FROM plan_table
+                WHERE statement_id = :id
+                AND operation = 'TABLE ACCESS'
+                AND options = 'FULL'
+            """, {"id": statement_id})
+            full_scans = [row[0] for row in cur if row[0] in LARGE_TABLES]
+            if full_scans:
+                regressions[name] = full_scans
+        conn.rollback()
+    finally:
+        cur.close()
+        conn.close()
+
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply schema migrations.")
+    parser.add_argument("--check-plans", action="store_true",
+                        help="EXPLAIN the hot queries and fail on full table scans")
+    args = parser.parse_args()
+
+    if not args.check_plans:
+        migrate()
+        raise SystemExit(0)
+
+    regressions = check_plans()
+    if regressions:
+        for name, tables in regressions.items():
+            print(f"❌ {name}: full scan of {', '.join(tables)}")
+        raise SystemExit(1)
+    print("✅ No hot query falls back to a full table scan.")
@@ -0,0 +1,76 @@
+"""
+Production run mode: several eventlet workers behind a sticky load balancer.
+
+Each worker is a separate process on its own port (BASE_PORT, BASE_PORT+1,
+...) running the Socket.IO app on eventlet. The workers share emits through
+SOCKETIO_MESSAGE_QUEUE (required with more than one worker), so an alert
+raised on one worker reaches sockets connected to any of them. Every worker
+runs the scheduler, and the workers elect one leader through the database to
+do the fleet-wide jobs (see job_locks.py). Put a load balancer with sticky sessions (e.g. nginx
+ip_hash) in front, since Socket.IO long-polling must keep hitting the same
+worker.
+
+    SOCKETIO_MESSAGE_QUEUE=redis://localhost:6379/0 python serve.py --workers 4 --base-port 5001
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+
+
+def run_worker(port, host):
+    # Must patch before anything imports socket/threading
+    import eventlet
+    eventlet.monkey_patch()
+
+    from app import create_app
+    from extensions import socketio
+    app = create_app()
+    # Exit through atexit on SIGTERM so the leader releases its lease instead
+    # of making the others wait for it to expire
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    socketio.run(app, host=host, port=port)
+
+
+def supervise(workers, base_port, host):
+    if workers > 1 and not os.getenv("SOCKETIO_MESSAGE_QUEUE"):
+        sys.exit("❌ SOCKETIO_MESSAGE_QUEUE must be set to run more than one worker")
+
+    children = []
+    for index in range(workers):
+        port = base_port + index
+        children.append(subprocess.Popen(
+            [sys.executable, __file__, "--worker-port", str(port), "--host", host]
+        ))
+        print(f"🚀 Worker {index} listening on {host}:{port}")
+
+    def shutdown(signum, frame):
+        for child in children:
+            child.terminate()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    # If any worker dies, stop the rest so the process manager restarts the set
+    while all(child.poll() is None for child in children):
+        time.sleep(1)
+    shutdown(None, None)
+    for child in children:
+        child.wait()
+    sys.exit(max(child.returncode or 0 for child in children))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the backend as several eventlet workers.")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WORKERS", "1")))
+    parser.add_argument("--base-port", type=int, default=int(os.getenv("BASE_PORT", "5001")))
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--worker-port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker_port:
+        run_worker(args.worker_port, args.host)
+    else:
+        supervise(args.workers, args.base_port, args.host)
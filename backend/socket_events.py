@@ -1,88 +1,115 @@
 from extensions import socketio
-from flask_socketio import emit
+from flask_socketio import emit, join_room
 from flask import request
-from db import get_connection
+from watchers import user_room
+import chat_history
+import chat_writer
+import user_cache
 import jwt
 import os
+import time
 
 JWT_SECRET = os.getenv("JWT_SECRET")
 
+# request.sid -> {"user_id", "expires_at", "token_checked"}; filled at connect
+# so chat messages need neither a JWT decode nor a users lookup
+_sessions = {}
+
+def _authenticate(token):
+    """Decode a JWT once. Returns a session dict; user_id is None for guests."""
+    session = {"user_id": None, "expires_at": None, "token_checked": bool(token)}
+    if not token:
+        return session
+    try:
+        payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
+        session["user_id"] = payload.get('user_id')
+        session["expires_at"] = payload.get('exp')
+        # Resolve the display name now so the first message is a cache hit
+        user_cache.display_name(session["user_id"])
+    except Exception as e:
+        print(f"Token error: {e}")
+    return session
+
+def _session_user_id(session):
+    if session["user_id"] is None:
+        return None
+    if session["expires_at"] is not None and session["expires_at"] <= time.time():
+        return None
+    return session["user_id"]
+
 @socketio.on('connect')
-def handle_connect():
+def handle_connect(auth=None):
     print(f"Client connected: {request.sid}")
+
+    # Authenticate once per socket. Authenticated sockets also get a
+    # per-user room for watchlist pushes. The token is only read from the
+    # auth payload: in the query string proxies and access logs would record it.
+    token = auth.get('token') if isinstance(auth, dict) else None
+    session = _authenticate(token)
+    _sessions[request.sid] = session
+    if session["user_id"] is not None:
+        join_room(user_room(session["user_id"]))
     
-    # Load chat history
-    conn = get_connection()
-    cur = conn.cursor()
+    # Latest messages from the in-memory buffer, no DB round trip
     try:
-        cur.execute("""
-            SELECT sender_name, message_text, created_at 
-            FROM messages 
-            ORDER BY created_at ASC
-            FETCH FIRST 50 ROWS ONLY
-        """)
-        history = []
-        for row in cur:
-            history.append({
-                "user": row[0],
-                "message": row[1],
-                "timestamp": row[2].isoformat() if row[2] else None
-            })
-        emit('chat_history', history)
+        emit('chat_history', chat_history.recent())
     except Exception as e:
         print(f"Error loading chat history: {e}")
-    finally:
-        cur.close()
-        conn.close()
 
 @socketio.on('disconnect')
 def handle_disconnect():
     print(f"Client disconnected: {request.sid}")
+    _sessions.pop(request.sid, None)
+
+@socketio.on('chat_history_before')
+def handle_history_before(data):
+    """
+    data = { 'before_id': 1234, 'limit': 50 }
+    Replies with the page of older messages, oldest first.
+    """
+    try:
+        messages = chat_history.older(data['before_id'], data.get('limit', chat_history.CHAT_HISTORY_SIZE))
+    except (KeyError, TypeError, ValueError):
+        emit('chat_error', {"error": "before_id must be a message id"})
+        return
+    except Exception as e:
+        print(f"Error loading chat history: {e}")
+        emit('chat_error', {"error": "Could not load older messages"})
+        return
+    emit('chat_history_page', {
+        "messages": messages,
+        "before_id": messages[0]["id"] if messages else None
+    })
 
 @socketio.on('chat_message')
 def handle_message(data):
     """
-    data = { 'token': '...', 'message': 'Hello world' }
+    data = { 'message': 'Hello world' }
+    The sender is the user authenticated at connect; a 'token' here is only
+    used by clients that didn't send one at connect.
     """
-    user_name = "Guest"
-    user_id = None
-    
-    # Authenticate if token provided
-    token = data.get('token')
-    if token:
-        try:
-            payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
-            user_id = payload.get('user_id')
-            # Fetch user name if possible, or just use generic 'Operator'
-            # For speed, let's just use 'Operator' + ID if we don't want extra DB query, 
-            # but better to query name.
-            conn = get_connection()
-            cur = conn.cursor()
-            cur.execute("SELECT full_name FROM users WHERE user_id = :uid", {"uid": user_id})
-            result = cur.fetchone()
-            if result:
-                user_name = result[0]
-            cur.close()
-            conn.close()
-        except Exception as e:
-            print(f"Token error: {e}")
-            user_name = "Guest"
+    session = _sessions.get(request.sid)
+    if session is None or (not session["token_checked"] and data.get('token')):
+        # Clients that only send the token with messages get verified once
+        session = _sessions[request.sid] = _authenticate(data.get('token'))
+
+    user_id = _session_user_id(session)
+    user_name = user_cache.display_name(user_id)
 
     message = data.get('message')
-    
-    # Save to DB
-    try:
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO messages (user_id, sender_name, message_text)
-            VALUES (:uid, :name, :msg)
-        """, {"uid": user_id, "name": user_name, "msg": message})
-        conn.commit()
-        cur.close()
-        conn.close()
-    except Exception as e:
-        print(f"Error saving message: {e}")
+    if not isinstance(message, str) or not message.strip():
+        emit('chat_error', {"error": "Message must be non-empty text"})
+        return
+    if chat_writer.message_too_long(message):
+        emit('chat_error', {"error": f"Message is too long (max {chat_writer.MAX_MESSAGE_BYTES} bytes)"})
+        return
+
+    # Persisted in the background; refuse the message if the writer is backed up
+    entry = chat_history.new_entry(user_name, message)
+    if not chat_writer.enqueue(user_id, user_name, message, entry):
+        emit('chat_error', {"error": "Chat is busy, please resend your message"})
+        return
+    chat_history.append(entry)
 
     # Broadcast to all
     emit('chat_message', {
@@ -0,0 +1,215 @@
+"""
+Precomputed dashboard statistics.
+
+neo_stats_daily holds per-day approach aggregates, and neo_stats_summary holds
+one row per day with the figures /api/stats serves. Ingestion calls refresh()
+inside its own transaction: it re-aggregates only the approach dates it
+touched and recounts the asteroid totals while holding today's summary row
+locked, so concurrent ingests serialise instead of losing each other's rows.
+get_stats then needs just a primary-key read.
+
+    python stats_summary.py            # compare the summary against full aggregates
+    python stats_summary.py --repair   # rebuild both tables from scratch
+"""
+import argparse
+
+import oracledb
+from db import get_connection
+
+REFRESH_DAILY_SQL = """
+    MERGE INTO neo_stats_daily d
+    USING (
+        SELECT TO_DATE(:stat_date, 'YYYY-MM-DD') AS stat_date,
+               COUNT(*) AS approach_count,
+               MIN(miss_distance_km) AS min_miss_km,
+               MAX(velocity_kmph) AS max_velocity_kmph
+        FROM asteroid_approach
+        WHERE approach_date >= TO_DATE(:stat_date, 'YYYY-MM-DD')
+        AND approach_date < TO_DATE(:stat_date, 'YYYY-MM-DD') + 1
+    ) s
+    ON (d.stat_date = s.stat_date)
+    WHEN MATCHED THEN
+    UPDATE SET
+        approach_count = s.approach_count,
+        min_miss_km = s.min_miss_km,
+        max_velocity_kmph = s.max_velocity_kmph,
+        refreshed_at = CURRENT_TIMESTAMP
+    WHEN NOT MATCHED THEN
+    INSERT (stat_date, approach_count, min_miss_km, max_velocity_kmph, refreshed_at)
+    VALUES (s.stat_date, s.approach_count, s.min_miss_km, s.max_velocity_kmph, CURRENT_TIMESTAMP)
+"""
+
+LOCK_TODAY_SQL = """
+    SELECT as_of_date FROM neo_stats_summary
+    WHERE as_of_date = TRUNC(SYSDATE)
+    FOR UPDATE
+"""
+
+# Placeholder that UPSERT_SUMMARY_SQL fills in; inserting it locks the row too
+INSERT_TODAY_SQL = """
+    INSERT INTO neo_stats_summary (as_of_date, refreshed_at)
+    VALUES (TRUNC(SYSDATE), CURRENT_TIMESTAMP)
+"""
+
+FULL_TOTALS_SQL = """
+    SELECT COUNT(*),
+           COUNT(CASE WHEN is_potentially_hazardous = 'YES' THEN 1 END)
+    FROM asteroids
+"""
+
+# Rolling windows match the original /api/stats queries: closest approach
+# from today on, fastest approach over the last 30 days
+UPSERT_SUMMARY_SQL = """
+    MERGE INTO neo_stats_summary s
+    USING (
+        SELECT TRUNC(SYSDATE) AS as_of_date,
+               :total_neos AS total_neos,
+               :hazardous_count AS hazardous_count,
+               (SELECT MIN(min_miss_km) FROM neo_stats_daily
+                WHERE stat_date >= TRUNC(SYSDATE)) AS closest_distance,
+               (SELECT MAX(max_velocity_kmph) FROM neo_stats_daily
+                WHERE stat_date >= TRUNC(SYSDATE - 30)) AS fastest_velocity
+        FROM dual
+    ) src
+    ON (s.as_of_date = src.as_of_date)
+    WHEN MATCHED THEN
+    UPDATE SET
+        total_neos = src.total_neos,
+        hazardous_count = src.hazardous_count,
+        closest_distance = src.closest_distance,
+        fastest_velocity = src.fastest_velocity,
+        refreshed_at = CURRENT_TIMESTAMP
+    WHEN NOT MATCHED THEN
+    INSERT (as_of_date, total_neos, hazardous_count, closest_distance, fastest_velocity, refreshed_at)
+    VALUES (src.as_of_date, src.total_neos, src.hazardous_count, src.closest_distance,
+            src.fastest_velocity, CURRENT_TIMESTAMP)
+"""
+
+READ_SUMMARY_SQL = """
+    SELECT total_neos, hazardous_count, closest_distance, fastest_velocity
+    FROM neo_stats_summary
+    WHERE as_of_date = TRUNC(SYSDATE)
+"""
+
+# The four queries /api/stats used to run on every call
+FULL_AGGREGATES_SQL = """
+    SELECT (SELECT COUNT(*) FROM asteroids),
+           (SELECT COUNT(*) FROM asteroids WHERE is_potentially_hazardous = 'YES'),
+           (SELECT MIN(miss_distance_km) FROM asteroid_approach
+            WHERE approach_date >= TRUNC(SYSDATE)),
+           (SELECT MAX(velocity_kmph) FROM asteroid_approach
+            WHERE approach_date >= TRUNC(SYSDATE - 30))
+    FROM dual
+"""
+
+REBUILD_DAILY_SQL = """
+    INSERT INTO neo_stats_daily (stat_date, approach_count, min_miss_km, max_velocity_kmph, refreshed_at)
+    SELECT TRUNC(approach_date), COUNT(*), MIN(miss_distance_km), MAX(velocity_kmph), CURRENT_TIMESTAMP
+    FROM asteroid_approach
+    GROUP BY TRUNC(approach_date)
+"""
+
+STAT_NAMES = ("total_neos", "hazardous_count", "closest_distance", "fastest_velocity")
+
+
+def _lock_today(cur):
+    """Lock today's summary row, creating it if this is the day's first refresh."""
+    cur.execute(LOCK_TODAY_SQL)
+    if cur.fetchone() is not None:
+        return
+    try:
+        cur.execute(INSERT_TODAY_SQL)
+    except oracledb.IntegrityError:
+        # A concurrent refresh inserted it first and has committed since
+        cur.execute(LOCK_TODAY_SQL)
+
+
+def refresh(conn, dates):
+    """
+    Update the summary after an ingest, on the caller's connection and
+    transaction. `dates` are the YYYY-MM-DD approach dates that were written.
+    """
+    cur = conn.cursor()
+    try:
+        if dates:
+            cur.executemany(REFRESH_DAILY_SQL, [{"stat_date": d} for d in sorted(dates)])
+
+        # Counted only once the lock is held, so the count includes every
+        # ingest that committed before us plus our own uncommitted rows
+        _lock_today(cur)
+        cur.execute(FULL_TOTALS_SQL)
+        total_neos, hazardous_count = cur.fetchone()
+
+        cur.execute(UPSERT_SUMMARY_SQL, {"total_neos": total_neos, "hazardous_count": hazardous_count})
+    finally:
+        cur.close()
+
+
+def read_summary(conn):
+    """
+    Return today's summary as a dict. The first read after midnight rolls the
+    windows forward from the daily table, which is a few dozen rows.
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute(READ_SUMMARY_SQL)
+        row = cur.fetchone()
+        if row is None:
+            refresh(conn, [])
+            conn.commit()
+            cur.execute(READ_SUMMARY_SQL)
+            row = cur.fetchone()
+        return dict(zip(STAT_NAMES, row))
+    finally:
+        cur.close()
+
+
+def check_consistency():
+    """Compare today's summary with the full aggregates. Returns a dict of mismatches."""
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        summary = read_summary(conn)
+        cur.execute(FULL_AGGREGATES_SQL)
+        actual = dict(zip(STAT_NAMES, cur.fetchone()))
+    finally:
+        cur.close()
+        conn.close()
+
+    mismatches = {}
+    for name in STAT_NAMES:
+        if summary[name] != actual[name]:
+            mismatches[name] = {"summary": summary[name], "actual": actual[name]}
+    return mismatches
+
+
+def rebuild():
+    """Recompute both summary tables from the base tables."""
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("DELETE FROM neo_stats_daily")
+        cur.execute(REBUILD_DAILY_SQL)
+        cur.execute("DELETE FROM neo_stats_summary")
+        refresh(conn, [])
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the precomputed dashboard stats.")
+    parser.add_argument("--repair", action="store_true", help="rebuild the summary tables")
+    args = parser.parse_args()
+
+    if args.repair:
+        print("🛠 Rebuilding stats summary...")
+        rebuild()
+
+    mismatches = check_consistency()
+    if mismatches:
+        for name, values in mismatches.items():
+            print(f"❌ {name}: summary={values['summary']} actual={values['actual']}")
+        raise SystemExit(1)
+    print("✅ Stats summary matches the full aggregates.")
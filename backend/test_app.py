@@ -0,0 +1,26 @@
+"""
+The app builds and serves its health routes without Oracle.
+
+    python -m pytest test_app.py
+"""
+import pytest
+
+from app import create_app
+
+
+@pytest.fixture
+def client():
+    app = create_app({"BACKGROUND_STARTUP": False, "SCHEDULER_ENABLED": False})
+    return app.test_client()
+
+
+def test_liveness_without_database(client):
+    response = client.get("/health/live")
+    assert response.status_code == 200
+    assert response.get_json() == {"status": "alive"}
+
+
+def test_not_ready_without_database(client):
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.get_json()["ready"] is False
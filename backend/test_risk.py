@@ -0,0 +1,66 @@
+"""
+Property-based parity check: calculate_risk_batch must match calculate_risk
+bit for bit on any input, including NaN/inf and missing (None) values.
+
+    python -m pytest test_risk.py
+"""
+import math
+
+import numpy as np
+import pytest
+from hypothesis import given, settings, strategies as st
+
+from risk import calculate_risk, calculate_risk_batch, current_model
+
+MODEL = current_model()
+
+# Plain floats plus values pinned to the model's band edges, where the
+# branches switch and rounding ties are most likely
+edge_values = st.sampled_from([
+    MODEL["dist_near_km"], MODEL["dist_far_km"], MODEL["diam_cap_m"], MODEL["vel_cap_kmph"],
+    0.0, -0.0, math.nan, math.inf, -math.inf,
+])
+numbers = st.one_of(st.floats(allow_nan=True, allow_infinity=True), edge_values)
+miss_distances = st.one_of(numbers, st.none())
+hazard_flags = st.sampled_from(["YES", "NO"])
+
+rows = st.lists(st.tuples(miss_distances, numbers, numbers, hazard_flags), min_size=1, max_size=50)
+
+
+def scalar_scores(rows):
+    return np.array([calculate_risk(*row) for row in rows], dtype=np.float64)
+
+
+def assert_bitwise_equal(expected, actual):
+    mismatches = np.flatnonzero(expected.view(np.int64) != actual.view(np.int64))
+    assert mismatches.size == 0, [(int(i), expected[i], actual[i]) for i in mismatches]
+
+
+@settings(max_examples=500, deadline=None)
+@given(rows)
+def test_batch_matches_scalar(rows):
+    miss, vel, diam, hazardous = zip(*rows)
+    batch = calculate_risk_batch(list(miss), list(vel), list(diam), list(hazardous))
+    assert_bitwise_equal(scalar_scores(rows), batch)
+
+
+@settings(max_examples=200, deadline=None)
+@given(rows)
+def test_boolean_hazard_flags_match_strings(rows):
+    miss, vel, diam, hazardous = zip(*rows)
+    as_strings = calculate_risk_batch(list(miss), list(vel), list(diam), list(hazardous))
+    as_bools = calculate_risk_batch(list(miss), list(vel), list(diam), [h == "YES" for h in hazardous])
+    assert_bitwise_equal(as_strings, as_bools)
+
+
+@settings(max_examples=200, deadline=None)
+@given(rows, st.integers(min_value=0, max_value=49), st.sampled_from([1, 2]))
+def test_none_velocity_or_diameter_raises_like_scalar(rows, index, column):
+    row = list(rows[index % len(rows)])
+    row[column] = None
+    with pytest.raises(TypeError):
+        calculate_risk(*row)
+    rows = list(rows)
+    rows[index % len(rows)] = tuple(row)
+    with pytest.raises(TypeError):
+        calculate_risk_batch(*map(list, zip(*rows)))
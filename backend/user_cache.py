@@ -0,0 +1,92 @@
+"""
+LRU + TTL cache of user_id -> display name.
+
+Chat resolves a sender's name once per socket session and then on every
+message; with this cache only the first lookup (and one per USER_CACHE_TTL
+after that) reads the users table. Anything that changes a user's name must
+call invalidate(user_id), which drops the name on every worker (see fleet.py).
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import fleet
+from db import get_connection
+from dotenv import load_dotenv
+
+load_dotenv()
+
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "600"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+GUEST_NAME = "Guest"
+
+USER_NAME_SQL = "SELECT full_name FROM users WHERE user_id = :uid"
+
+_lock = threading.Lock()
+_entries = OrderedDict()   # user_id -> (expires_at, name)
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def _load(user_id):
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(USER_NAME_SQL, {"uid": user_id})
+        row = cur.fetchone()
+    finally:
+        cur.close()
+        conn.close()
+    return row[0] if row and row[0] else GUEST_NAME
+
+
+def display_name(user_id):
+    """
+    Name to show for user_id; reads the DB only on a miss or after expiry.
+    If that read fails the sender shows as GUEST_NAME, which is not cached.
+    """
+    if user_id is None:
+        return GUEST_NAME
+
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(user_id)
+        if entry is not None and entry[0] > now:
+            _entries.move_to_end(user_id)
+            _stats["hits"] += 1
+            return entry[1]
+        _stats["misses"] += 1
+
+    try:
+        name = _load(user_id)
+    except Exception as e:
+        print(f"❌ Could not load the name of user {user_id}: {e}")
+        return GUEST_NAME
+    with _lock:
+        _entries[user_id] = (time.monotonic() + USER_CACHE_TTL, name)
+        _entries.move_to_end(user_id)
+        while len(_entries) > USER_CACHE_MAX_ENTRIES:
+            _entries.popitem(last=False)
+    return name
+
+
+def _invalidate_local(user_id):
+    with _lock:
+        _entries.pop(user_id, None)
+        _stats["invalidations"] += 1
+
+
+def invalidate(user_id):
+    """Forget a user's cached name on every worker, e.g. after a profile update."""
+    _invalidate_local(user_id)
+    fleet.publish("user_invalidate", user_id)
+
+
+fleet.on("user_invalidate", _invalidate_local)
+
+
+def user_cache_stats():
+    with _lock:
+        stats = dict(_stats)
+        stats["entries"] = len(_entries)
+    return stats
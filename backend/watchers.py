@@ -0,0 +1,138 @@
+"""
+In-memory index of who watches which asteroid, for targeted Socket.IO pushes.
+
+Every authenticated socket joins the room user_room(user_id) on connect. The
+asteroid -> subscribers index is loaded from the watchlist table once and then
+kept in step by the watchlist routes, on every worker (see fleet.py), so when
+ingestion or re-scoring changes
+a watched asteroid's approach, only the rooms of its watchers are sent a
+watchlist_update. No work is done for asteroids nobody watches.
+"""
+import os
+import threading
+import time
+
+import fleet
+from db import get_connection
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Watchlist changes reach every worker as fleet events; the ingesting worker
+# still reloads the index when it is older than this, in case one was missed
+WATCHERS_MAX_AGE = int(os.getenv("WATCHERS_MAX_AGE", "300"))
+
+WATCHLIST_INDEX_SQL = "SELECT asteroid_id, user_id FROM watchlist"
+
+_lock = threading.Lock()
+_subscribers = {}   # asteroid_id -> set(user_id)
+_loaded_at = None
+_emit = None
+_stats = {"updates": 0, "users_notified": 0}
+
+
+def user_room(user_id):
+    return f"user:{user_id}"
+
+
+def init_watchers(emit):
+    """emit(event, payload, room) sends one event to one room."""
+    global _emit
+    _emit = emit
+
+
+def load():
+    """(Re)build the index from the watchlist table."""
+    global _loaded_at
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(WATCHLIST_INDEX_SQL)
+        index = {}
+        for asteroid_id, user_id in cur:
+            index.setdefault(asteroid_id, set()).add(user_id)
+    finally:
+        cur.close()
+        conn.close()
+
+    with _lock:
+        _subscribers.clear()
+        _subscribers.update(index)
+        _loaded_at = time.monotonic()
+    print(f"👀 Watchlist index loaded: {len(index)} watched asteroids")
+
+
+def ensure_fresh():
+    """Reload the index if it was never loaded or is older than WATCHERS_MAX_AGE."""
+    if _emit is None:
+        return
+    if _loaded_at is None or time.monotonic() - _loaded_at > WATCHERS_MAX_AGE:
+        load()
+
+
+def _subscribe_local(change):
+    with _lock:
+        _subscribers.setdefault(change["asteroid_id"], set()).add(change["user_id"])
+
+
+def _unsubscribe_local(change):
+    with _lock:
+        users = _subscribers.get(change["asteroid_id"])
+        if users is not None:
+            users.discard(change["user_id"])
+            if not users:
+                del _subscribers[change["asteroid_id"]]
+
+
+def subscribe(user_id, asteroid_id):
+    change = {"user_id": user_id, "asteroid_id": asteroid_id}
+    _subscribe_local(change)
+    fleet.publish("watch_subscribe", change)
+
+
+def unsubscribe(user_id, asteroid_id):
+    change = {"user_id": user_id, "asteroid_id": asteroid_id}
+    _unsubscribe_local(change)
+    fleet.publish("watch_unsubscribe", change)
+
+
+fleet.on("watch_subscribe", _subscribe_local)
+fleet.on("watch_unsubscribe", _unsubscribe_local)
+
+
+def is_watched(asteroid_id):
+    # Before load() nothing is routed, so nothing needs collecting either
+    return asteroid_id in _subscribers
+
+
+def notify(changes):
+    """
+    Push changed approaches to the users watching them. `changes` is a list of
+    dicts with at least an "asteroid_id" key. Each user gets one event with
+    all of their changes. Returns the number of users notified.
+    """
+    if _emit is None or not changes:
+        return 0
+
+    per_user = {}
+    with _lock:
+        for change in changes:
+            for user_id in _subscribers.get(change["asteroid_id"], ()):
+                per_user.setdefault(user_id, []).append(change)
+
+    for user_id, user_changes in per_user.items():
+        _emit("watchlist_update", {"changes": user_changes}, user_room(user_id))
+
+    with _lock:
+        _stats["updates"] += 1
+        _stats["users_notified"] += len(per_user)
+    return len(per_user)
+
+
+def watcher_stats():
+    with _lock:
+        stats = dict(_stats)
+        stats["loaded"] = _loaded_at is not None
+        stats["watched_asteroids"] = len(_subscribers)
+        stats["subscriptions"] = sum(len(users) for users in _subscribers.values())
+    return stats
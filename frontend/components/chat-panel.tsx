@@ -16,7 +16,9 @@ export default function ChatPanel() {
         // Connect to socket backend
         const newSocket = io(process.env.NEXT_PUBLIC_API_URL?.replace('/api', '') || 'http://localhost:5001', {
             transports: ['websocket'],
-            autoConnect: true
+            autoConnect: true,
+            // Authenticated sockets join a per-user room for watchlist updates
+            auth: token ? { token } : {}
         });
 
         newSocket.on('connect', () => {
@@ -31,6 +33,10 @@ export default function ChatPanel() {
             setMessages(prev => [...prev, msg]);
         });
 
+        newSocket.on('chat_error', (data: any) => {
+            setMessages(prev => [...prev, { user: 'SYSTEM', message: `⚠️ ${data.error}`, isSystem: true }]);
+        });
+
         // Also listen for alerts
         newSocket.on('alert', (alertData: any) => {
             alertData.alerts.forEach((a: any) => {
@@ -42,12 +48,18 @@ export default function ChatPanel() {
             setMessages(prev => [...prev, { user: 'SYSTEM', message: `📡 ${data.message}`, isSystem: true }]);
         });
 
+        newSocket.on('watchlist_update', (data: any) => {
+            data.changes.forEach((c: any) => {
+                setMessages(prev => [...prev, { user: 'SYSTEM', message: `👀 Watched asteroid ${c.asteroid_id} updated (Risk: ${c.risk_score})`, isSystem: true }]);
+            });
+        });
+
         setSocket(newSocket);
 
         return () => {
             newSocket.disconnect();
         };
-    }, []);
+    }, [token]);
 
     // Auto-scroll on new messages
     useEffect(() => {